@@ -1,10 +1,11 @@
 """Mock data controller for demonstration purposes."""
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 
+from services.cache_service import clear_all_caches
 from services.mock_data_service import get_mock_data_service
 from setup_database import DatabaseSetup
 
@@ -15,50 +16,91 @@ class MockPopulator:
     def __init__(self):
         self.db_setup = DatabaseSetup()
         self.mock_service = get_mock_data_service()
+        # The mock data files never change at runtime, so read-only responses are built once
+        self._users_response: Optional[Dict[str, Any]] = None
+        self._summary_response: Optional[Dict[str, Any]] = None
     
     async def populate_all_mock_data(self):
         """Populate all mock data."""
         import asyncio
         from concurrent.futures import ThreadPoolExecutor
         
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            # Create schema first
-            schema_result = await loop.run_in_executor(executor, self.db_setup.create_schema)
-            if not schema_result:
-                return {"error": "Failed to create schema"}
-            
-            # Populate users
-            users_result = await loop.run_in_executor(executor, self.db_setup.populate_users)
-            if not users_result:
-                return {"error": "Failed to populate users"}
-            
-            # Populate transactions
-            transactions_result = await loop.run_in_executor(executor, self.db_setup.populate_transactions)
-            if not transactions_result:
-                return {"error": "Failed to populate transactions"}
-            
-            return {
-                "users_populated": True,
-                "transactions_populated": True,
-                "schema_created": True
-            }
+        try:
+            loop = asyncio.get_event_loop()
+            with ThreadPoolExecutor() as executor:
+                # Build the rows while the schema is created; only the inserts need it
+                prepare_future = loop.run_in_executor(executor, self.db_setup.prepare_rows)
+                
+                # Create schema first
+                schema_result = await self.db_setup.create_schema_async()
+                users_prepared, transactions_prepared = await prepare_future
+                if not schema_result:
+                    return {"error": "Failed to create schema"}
+                
+                # Populate users
+                users_result = await self.db_setup.populate_users(users_prepared)
+                if not users_result:
+                    return {"error": "Failed to populate users"}
+                
+                # Populate transactions
+                transactions_result = await self.db_setup.populate_transactions(transactions_prepared)
+                if not transactions_result:
+                    return {"error": "Failed to populate transactions"}
+                
+                return {
+                    "users_populated": True,
+                    "transactions_populated": True,
+                    "schema_created": True
+                }
+        
+        finally:
+            # The tables were dropped and reseeded without going through
+            # SupabaseClient's writes, so nothing invalidated cached analytics
+            clear_all_caches()
     
     async def clear_mock_data(self):
         """Clear all mock data."""
-        import asyncio
-        from concurrent.futures import ThreadPoolExecutor
-        
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            # For now, just recreate schema (which drops tables)
-            result = await loop.run_in_executor(executor, self.db_setup.create_schema)
-            return {"cleared": result}
+        # For now, just recreate schema (which drops tables)
+        try:
+            result = await self.db_setup.create_schema_async()
+        finally:
+            clear_all_caches()
+        return {"cleared": result}
+    
+    def get_mock_users_response(self) -> Dict[str, Any]:
+        """Get the /mock/users response, built on first use."""
+        if self._users_response is None:
+            users = self.mock_service.get_mock_users()
+            self._users_response = {
+                "success": True,
+                "count": len(users),
+                "users": [
+                    {
+                        "id": user.id,
+                        "email": user.email,
+                        "full_name": user.full_name,
+                        "profile_type": user.preferences.get("profile_type", "unknown"),
+                        "preferences": user.preferences
+                    }
+                    for user in users
+                ]
+            }
+        return self._users_response
+    
+    def get_mock_summary_response(self) -> Dict[str, Any]:
+        """Get the /mock/summary response, built on first use."""
+        if self._summary_response is None:
+            self._summary_response = {
+                "success": True,
+                **self.get_mock_data_summary()
+            }
+        return self._summary_response
     
     def get_mock_data_summary(self):
         """Get summary of mock data."""
         users = self.mock_service.get_mock_users()
-        total_transactions = sum(len(self.mock_service.get_mock_transactions(user.id)) for user in users)
+        transactions_by_user = self.mock_service.get_all_mock_transactions()
+        total_transactions = sum(len(transactions_by_user.get(user.id, [])) for user in users)
         
         return {
             "total_users": len(users),
@@ -67,7 +109,7 @@ class MockPopulator:
                 {
                     "id": user.id,
                     "name": user.full_name,
-                    "transactions": len(self.mock_service.get_mock_transactions(user.id))
+                    "transactions": len(transactions_by_user.get(user.id, []))
                 }
                 for user in users
             ]
@@ -87,23 +129,7 @@ router = APIRouter(prefix="/mock", tags=["mock-data"])
 async def get_mock_users():
     """Get all mock users."""
     try:
-        mock_service = get_mock_data_service()
-        users = mock_service.get_mock_users()
-        
-        return {
-            "success": True,
-            "count": len(users),
-            "users": [
-                {
-                    "id": user.id,
-                    "email": user.email,
-                    "full_name": user.full_name,
-                    "profile_type": user.preferences.get("profile_type", "unknown"),
-                    "preferences": user.preferences
-                }
-                for user in users
-            ]
-        }
+        return mock_populator.get_mock_users_response()
     except Exception as e:
         logger.error(f"Error getting mock users: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -174,11 +200,7 @@ async def get_mock_user_summary(user_id: str):
 async def get_all_mock_summaries():
     """Get financial summaries for all mock users."""
     try:
-        summary = mock_populator.get_mock_data_summary()
-        return {
-            "success": True,
-            **summary
-        }
+        return mock_populator.get_mock_summary_response()
     except Exception as e:
         logger.error(f"Error getting mock summaries: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -16,21 +16,23 @@ logger = logging.getLogger(__name__)
 # Create main router
 router = APIRouter()
 
+HEALTH_RESPONSE = {
+    "status": "healthy",
+    "version": "1.0.0",
+    "modules": [
+        "auth",
+        "transactions",
+        "expenses",
+        "timeline",
+        "ai",
+    ]
+}
+
 
 @router.get("/health")
 async def health_check():
     """Application health check."""
-    return {
-        "status": "healthy",
-        "version": "1.0.0",
-        "modules": [
-            "auth",
-            "transactions",
-            "expenses", 
-            "timeline",
-            "ai",
-        ]
-    }
+    return HEALTH_RESPONSE
 
 # Include all module routers
 router.include_router(auth_router)
@@ -4,6 +4,7 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 # Import modular components
 from config.settings import get_settings
@@ -35,10 +36,10 @@ async def lifespan(app: FastAPI):
         except Exception as db_error:
             logging.warning(f"⚠️  Supabase connection test failed: {db_error}")
         
-        # Initialize AI services (optional)
+        # Initialize AI services (optional); this also warms the provider shared by /api/ai requests
         try:
-            from providers.llms import LLMProviderFactory
-            llm_provider = LLMProviderFactory.create_llm()
+            from src.modules.ai.controller import get_llm_provider
+            llm_provider = await get_llm_provider()
             if llm_provider:
                 logging.info(f"✅ AI Provider initialized: {llm_provider.__class__.__name__}")
             else:
@@ -65,7 +66,8 @@ def create_app() -> FastAPI:
         title="Stori Expense Tracker API",
         description="AI-powered expense tracking with financial insights",
         version="1.0.0",
-        lifespan=lifespan
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse
     )
 
     # Add CORS middleware
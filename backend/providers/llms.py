@@ -1,7 +1,10 @@
 """LLM provider factory and implementations."""
 
 import logging
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Tuple
+
+import httpx
 from langchain_core.language_models.llms import BaseLanguageModel
 from langchain_openai import OpenAI, ChatOpenAI, AzureChatOpenAI
 from langchain_ollama import OllamaLLM
@@ -9,6 +12,23 @@ from langchain_community.llms import Bedrock
 
 from config import get_settings
 
+# Connection pool shared by the OpenAI-compatible providers; httpx's default
+# of 20 keep-alive connections is easily exhausted by concurrent chat requests
+LLM_HTTP_LIMITS = httpx.Limits(
+    max_connections=200,
+    max_keepalive_connections=100,
+    keepalive_expiry=30.0
+)
+
+
+@lru_cache(maxsize=1)
+def _openai_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """Get the (sync, async) HTTP clients reused by every OpenAI-compatible LLM."""
+    return (
+        httpx.Client(limits=LLM_HTTP_LIMITS, http2=True),
+        httpx.AsyncClient(limits=LLM_HTTP_LIMITS, http2=True)
+    )
+
 
 class LLMProviderFactory:
     """Factory class for creating LLM providers."""
@@ -22,11 +42,17 @@ class LLMProviderFactory:
         
         logging.info(f"Using LLM provider: {provider}")
         temperature = settings.llm_temperature
+        http_client, http_async_client = _openai_http_clients()
 
         if provider == "openai":
             if not settings.openai_api_key:
                 raise ValueError("OPENAI_API_KEY not found in environment variables.")
-            return OpenAI(api_key=settings.openai_api_key, temperature=temperature)
+            return OpenAI(
+                api_key=settings.openai_api_key,
+                temperature=temperature,
+                http_client=http_client,
+                http_async_client=http_async_client
+            )
         
         elif provider == "ollama":
             if not settings.ollama_llm_model:
@@ -54,7 +80,9 @@ class LLMProviderFactory:
                 azure_endpoint=settings.azure_endpoint,
                 api_version=settings.azure_api_version,
                 azure_deployment=settings.azure_llm_deployment,
-                temperature=temperature
+                temperature=temperature,
+                http_client=http_client,
+                http_async_client=http_async_client
             )
         
         elif provider == "bedrock":
@@ -92,7 +120,9 @@ class LLMProviderFactory:
                 api_key=settings.lm_studio_api_key,
                 base_url=f"{settings.lm_studio_base_url}/v1",
                 model=settings.lm_studio_model,
-                temperature=temperature
+                temperature=temperature,
+                http_client=http_client,
+                http_async_client=http_async_client
             )
         
         elif provider == "openrouter":
@@ -106,7 +136,9 @@ class LLMProviderFactory:
                 api_key=settings.openrouter_api_key,
                 base_url="https://openrouter.ai/api/v1",
                 model=settings.openrouter_model,
-                temperature=temperature
+                temperature=temperature,
+                http_client=http_client,
+                http_async_client=http_async_client
             )
         
         else:
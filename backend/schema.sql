@@ -4,6 +4,7 @@
 -- Drop existing tables if they exist (careful in production!)
 DROP TABLE IF EXISTS public.transactions CASCADE;
 DROP TABLE IF EXISTS public.users CASCADE;
+DROP TABLE IF EXISTS public.user_daily_summary;
 
 -- Create users table
 CREATE TABLE public.users (
@@ -18,7 +19,7 @@ CREATE TABLE public.users (
 -- Create transactions table
 CREATE TABLE public.transactions (
     id TEXT PRIMARY KEY,
-    user_id TEXT NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL REFERENCES public.users(id) ON DELETE CASCADE DEFERRABLE INITIALLY IMMEDIATE,
     amount DECIMAL(15,2) NOT NULL,
     description TEXT NOT NULL,
     category VARCHAR(100) NOT NULL,
@@ -33,6 +34,9 @@ CREATE INDEX idx_transactions_user_id ON public.transactions(user_id);
 CREATE INDEX idx_transactions_date ON public.transactions(date);
 CREATE INDEX idx_transactions_type ON public.transactions(type);
 CREATE INDEX idx_transactions_category ON public.transactions(category);
+-- Serves the AI module's per-user, per-type date-range reads; INCLUDE lets
+-- the aggregation queries answer from the index without visiting the heap
+CREATE INDEX idx_transactions_user_type_date ON public.transactions(user_id, type, date DESC) INCLUDE (amount, category);
 CREATE INDEX idx_users_email ON public.users(email);
 
 -- Create updated_at trigger function
@@ -53,9 +57,119 @@ CREATE TRIGGER update_transactions_updated_at
     BEFORE UPDATE ON public.transactions
     FOR EACH ROW EXECUTE FUNCTION public.update_updated_at_column();
 
+-- Everything the AI advisor aggregates for a user in one call: totals, top
+-- expense categories and weekly expense totals over the days_back window
+-- ending at the user's latest transaction (or today if they have none).
+CREATE OR REPLACE FUNCTION public.ai_financial_context(p_user_id TEXT, days_back INT DEFAULT 30)
+RETURNS JSON AS $$
+    WITH bounds AS (
+        SELECT COALESCE(MAX(date), CURRENT_DATE) AS end_date
+        FROM public.transactions
+        WHERE user_id = p_user_id
+    ),
+    period AS (
+        SELECT t.amount, t.category, t.type, t.date
+        FROM public.transactions t, bounds b
+        WHERE t.user_id = p_user_id
+          AND t.date BETWEEN b.end_date - days_back AND b.end_date
+    ),
+    categories AS (
+        SELECT category, SUM(ABS(amount)) AS total_amount, COUNT(*) AS transaction_count
+        FROM period
+        WHERE type = 'expense'
+        GROUP BY category
+        ORDER BY total_amount DESC
+        LIMIT 5
+    ),
+    weeks AS (
+        -- Postgres weeks start on Monday
+        SELECT date_trunc('week', date)::date AS week_start, SUM(amount) AS total_amount
+        FROM period
+        WHERE type = 'expense'
+        GROUP BY 1
+    )
+    SELECT json_build_object(
+        'start_date', b.end_date - days_back,
+        'end_date', b.end_date,
+        'total_income', (SELECT COALESCE(SUM(ABS(amount)), 0) FROM period WHERE type = 'income'),
+        'total_expenses', (SELECT COALESCE(SUM(ABS(amount)), 0) FROM period WHERE type = 'expense'),
+        'transaction_count', (SELECT COUNT(*) FROM period),
+        'top_categories', (SELECT COALESCE(json_agg(c ORDER BY c.total_amount DESC), '[]'::json) FROM categories c),
+        'weekly_totals', (SELECT COALESCE(json_agg(w ORDER BY w.week_start), '[]'::json) FROM weeks w)
+    )
+    FROM bounds b;
+$$ LANGUAGE sql STABLE;
+
+-- Per-user daily totals by category and type, so summaries read one row per
+-- (day, category, type) instead of every transaction in the window. A row
+-- trigger on transactions applies each change as a delta, so a write only
+-- touches the summary rows for its own (user, day, category, type).
+CREATE TABLE public.user_daily_summary (
+    user_id TEXT NOT NULL,
+    date DATE NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    type VARCHAR(20) NOT NULL,
+    total_amount NUMERIC NOT NULL,
+    total_abs_amount NUMERIC NOT NULL,
+    transaction_count BIGINT NOT NULL,
+    PRIMARY KEY (user_id, date, category, type)
+);
+
+-- Runs as the owner so writes made under RLS can still maintain the summary
+CREATE OR REPLACE FUNCTION public.apply_user_daily_summary_delta()
+RETURNS TRIGGER AS $$
+DECLARE
+    remaining BIGINT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        TRUNCATE public.user_daily_summary;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE public.user_daily_summary
+        SET total_amount = total_amount - OLD.amount,
+            total_abs_amount = total_abs_amount - ABS(OLD.amount),
+            transaction_count = transaction_count - 1
+        WHERE user_id = OLD.user_id AND date = OLD.date
+          AND category = OLD.category AND type = OLD.type
+        RETURNING transaction_count INTO remaining;
+
+        IF remaining = 0 THEN
+            DELETE FROM public.user_daily_summary
+            WHERE user_id = OLD.user_id AND date = OLD.date
+              AND category = OLD.category AND type = OLD.type;
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.user_daily_summary AS s
+            (user_id, date, category, type, total_amount, total_abs_amount, transaction_count)
+        VALUES (NEW.user_id, NEW.date, NEW.category, NEW.type, NEW.amount, ABS(NEW.amount), 1)
+        ON CONFLICT (user_id, date, category, type) DO UPDATE
+        SET total_amount = s.total_amount + EXCLUDED.total_amount,
+            total_abs_amount = s.total_abs_amount + EXCLUDED.total_abs_amount,
+            transaction_count = s.transaction_count + 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- UPDATE OF skips updates that leave the summarized columns alone
+CREATE TRIGGER apply_user_daily_summary_delta
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, date, category, type, amount
+    ON public.transactions
+    FOR EACH ROW EXECUTE FUNCTION public.apply_user_daily_summary_delta();
+
+CREATE TRIGGER truncate_user_daily_summary
+    AFTER TRUNCATE ON public.transactions
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_user_daily_summary_delta();
+
 -- Enable Row Level Security (RLS)
 ALTER TABLE public.users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.transactions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.user_daily_summary ENABLE ROW LEVEL SECURITY;
 
 -- Create RLS policies (adjust as needed for your auth setup)
 CREATE POLICY "Users can view own profile" ON public.users
@@ -82,6 +196,9 @@ GRANT SELECT, INSERT, UPDATE, DELETE ON public.users TO authenticated;
 GRANT SELECT, INSERT, UPDATE, DELETE ON public.transactions TO authenticated;
 GRANT SELECT ON public.users TO anon;
 GRANT SELECT ON public.transactions TO anon;
+GRANT EXECUTE ON FUNCTION public.ai_financial_context(TEXT, INT) TO authenticated, anon;
+-- No policies either: only the backend's service role reads the summary
+REVOKE ALL ON public.user_daily_summary FROM authenticated, anon;
 
 -- Insert confirmation
 SELECT 'Database schema created successfully! Now run setup_database.py to populate data.' as status;
\ No newline at end of file
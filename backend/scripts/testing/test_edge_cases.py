@@ -8,7 +8,7 @@ import tempfile
 import os
 from datetime import datetime, date
 from decimal import Decimal
-from setup_database import DatabaseSetup
+from setup_database import DatabaseSetup, TransactionRow
 
 
 def create_test_transaction_file():
@@ -169,11 +169,12 @@ def test_validation_logic():
     
     for i, test_case in enumerate(test_cases, 1):
         print(f"\n  Test case {i}: {test_case.get('description', 'No description')}")
-        is_valid = setup._validate_transaction_data(test_case, 'test@example.com')
+        row = TransactionRow(**test_case)
+        is_valid = setup._validate_transaction_data(row, 'test@example.com')
         print(f"    Result: {'✅ Valid' if is_valid else '❌ Invalid'}")
         if is_valid:
-            print(f"    Final type: {test_case.get('type')}")
-            print(f"    Final amount: {test_case.get('amount')}")
+            print(f"    Final type: {row.type}")
+            print(f"    Final amount: {row.amount}")
 
 
 def test_user_validation():
@@ -1,5 +1,6 @@
 """AI financial advisor service for expense analysis and recommendations."""
 
+import heapq
 import logging
 from typing import List, Tuple, Dict, Any, Optional
 from langchain_core.language_models.base import BaseLanguageModel
@@ -83,7 +84,7 @@ Financial Advice:
         # Format recent transactions
         recent_transactions = [
             f"{t.type}: ${t.amount} - {t.category} ({t.date})"
-            for t in sorted(transactions, key=lambda x: x.date, reverse=True)[:10]
+            for t in heapq.nlargest(10, transactions, key=lambda x: x.date)
         ]
         
         # Trim chat history to reduce tokens
@@ -0,0 +1,104 @@
+"""In-process TTL caching for read-heavy financial analytics."""
+
+import asyncio
+import copy
+import functools
+import inspect
+import logging
+from typing import Any, Callable, Dict, Hashable, List
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_TTL_SECONDS = 60
+DEFAULT_CACHE_MAXSIZE = 1024
+
+# Per-user generation counters. Writes bump a user's generation so every
+# cached entry computed before the write is no longer reachable.
+_user_generations: Dict[str, int] = {}
+
+# Bumped on every write, for cross-user caches that any user's data feeds into
+_global_generation = 0
+
+# Every cache created by `async_ttl_cache`, so they can be cleared together
+_registered_caches: List[TTLCache] = []
+
+
+def invalidate_user_cache(user_id: str) -> None:
+    """Invalidate all cached analytics for a user after their data changed."""
+    global _global_generation
+    if user_id:
+        _user_generations[user_id] = _user_generations.get(user_id, 0) + 1
+        _global_generation += 1
+
+
+def clear_all_caches() -> None:
+    """Drop every cached entry (mainly useful for tests and admin tooling)."""
+    global _global_generation
+    for cache in _registered_caches:
+        cache.clear()
+    _user_generations.clear()
+    _global_generation = 0
+
+
+def async_ttl_cache(
+    ttl: int = DEFAULT_CACHE_TTL_SECONDS,
+    maxsize: int = DEFAULT_CACHE_MAXSIZE,
+    per_user: bool = True
+) -> Callable:
+    """Cache an async per-user method keyed by its instance and arguments for `ttl` seconds.
+
+    The decorated method must take `user_id` as its first argument after
+    `self`. With `per_user=False` it may take any arguments, and its entries
+    are invalidated by a write for any user. Concurrent calls for the same
+    key share a single computation.
+
+    Only returned values are cached; a call that raises stores nothing, so
+    decorated methods should let errors propagate rather than return a
+    fallback. Every caller gets its own shallow copy of the cached value:
+    the top-level list, dict or model may be changed freely, but the rows
+    and nested values inside it are shared and must be treated as read-only.
+    """
+    def decorator(func: Callable) -> Callable:
+        cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        locks: Dict[Hashable, asyncio.Lock] = {}
+        signature = inspect.signature(func)
+        _registered_caches.append(cache)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs) -> Any:
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            call_args = tuple(bound.arguments.values())[1:]
+            # Keyed on the instance too, so services over different clients don't share entries
+            if per_user:
+                key = (self, *call_args, _user_generations.get(call_args[0], 0))
+            else:
+                key = (self, *call_args, _global_generation)
+
+            try:
+                return copy.copy(cache[key])
+            except KeyError:
+                pass
+
+            lock = locks.setdefault(key, asyncio.Lock())
+            try:
+                async with lock:
+                    # Another caller may have filled the entry while we waited
+                    try:
+                        return copy.copy(cache[key])
+                    except KeyError:
+                        pass
+
+                    value = await func(self, *args, **kwargs)
+                    cache[key] = value
+                    return copy.copy(value)
+            finally:
+                if not lock.locked():
+                    locks.pop(key, None)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -56,10 +56,19 @@ class MockDataService:
     
     def get_mock_transactions(self, user_id: str) -> List[Transaction]:
         """Get all mock transactions for a specific user."""
+        return self._load_all_transactions().get(user_id, [])
+    
+    def get_all_mock_transactions(self) -> Dict[str, List[Transaction]]:
+        """Get all transactions for all mock users, keyed by user ID."""
+        return dict(self._load_all_transactions())
+    
+    def _load_all_transactions(self) -> Dict[str, List[Transaction]]:
+        """Parse every mock user's transaction file once and cache the result."""
         if self._transactions_cache is None:
             self._transactions_cache = {}
             
-            # Load transactions for each user
+            # Load transactions for each user, stamped with one load time
+            loaded_at = datetime.now()
             users = self.get_mock_users()
             for user in users:
                 # Map user ID to simplified transaction filename
@@ -114,8 +123,8 @@ class MockDataService:
                             category=tx_data["category"],
                             type=tx_data["type"],
                             date=tx_date,
-                            created_at=datetime.now(),
-                            updated_at=datetime.now()
+                            created_at=loaded_at,
+                            updated_at=loaded_at
                         )
                         transactions.append(transaction)
                     except (ValueError, KeyError, TypeError, Exception) as e:
@@ -125,17 +134,7 @@ class MockDataService:
                 
                 self._transactions_cache[user.id] = transactions
         
-        return self._transactions_cache.get(user_id, [])
-    
-    def get_all_mock_transactions(self) -> Dict[str, List[Transaction]]:
-        """Get all transactions for all mock users."""
-        users = self.get_mock_users()
-        all_transactions = {}
-        
-        for user in users:
-            all_transactions[user.id] = self.get_mock_transactions(user.id)
-        
-        return all_transactions
+        return self._transactions_cache
     
     def get_mock_user_summary(self, user_id: str) -> Dict:
         """Get a summary of a mock user's financial data."""
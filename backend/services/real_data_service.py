@@ -1,13 +1,113 @@
 """Real database service for fetching actual user financial data."""
 
+import functools
 import logging
 from datetime import datetime, timedelta, date
-from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from httpx import QueryParams
 from supabase import Client
 
+from services.cache_service import async_ttl_cache
+
 logger = logging.getLogger(__name__)
 
+# Columns consumed by the analytics below; avoids pulling descriptions and metadata
+SUMMARY_COLUMNS = 'amount,category,type,date'
+TRENDS_COLUMNS = 'amount,type,date'
+DAILY_SUMMARY_COLUMNS = 'total_amount,total_abs_amount,transaction_count,category,type,date'
+
+# Safety ceiling on rows fetched for a single analytics window
+MAX_TRANSACTIONS_PER_QUERY = 10000
+
+# Cross-user listings are polled by dashboards; keep them for a short window
+USERS_CACHE_TTL_SECONDS = 30
+
+# Precompiled row decoders: one C-level call pulls every needed field from a row
+_daily_summary_row = itemgetter(
+    'total_amount', 'total_abs_amount', 'transaction_count', 'category', 'type', 'date'
+)
+_trends_row = itemgetter('amount', 'type', 'date')
+
+
+@functools.lru_cache(maxsize=256)
+def _tx_query_params(columns: str, user_id: str) -> QueryParams:
+    """Query string for the `select`/`user_id` prefix shared by transaction reads."""
+    return QueryParams({'select': columns, 'user_id': f'eq.{user_id}'})
+
+
+def _factorize(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Encode values as integer codes, numbering uniques by first appearance.
+
+    Returns `(codes, uniques, first_rows)` where `first_rows[i]` is the row at
+    which `uniques[i]` first appears.
+    """
+    uniques, first_index, codes = np.unique(values, return_index=True, return_inverse=True)
+    order = np.argsort(first_index)
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    return remap[codes.ravel()], uniques[order], first_index[order]
+
+
+def _to_cents(amounts: Sequence) -> np.ndarray:
+    """Convert decimal currency amounts to exact integer cents."""
+    return np.rint(np.array(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def _aggregate(
+    cents: np.ndarray,
+    abs_cents: np.ndarray,
+    counts: np.ndarray,
+    type_codes: np.ndarray,
+    cat_codes: np.ndarray,
+    month_codes: np.ndarray,
+    n_cats: int,
+    n_months: int
+) -> Tuple[int, int, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Reduce pre-grouped transaction totals per type, category and month.
+
+    Each row carries the signed and absolute sums (in integer cents, so every
+    total is exact) and the transaction count of one group. `type_codes` is 1
+    for income and 0 for expenses; category and month codes must be dense in
+    `[0, n)`. Returns `(total_income, total_expense, cat_totals, cat_counts,
+    month_income, month_expense, month_counts)`.
+    """
+    # Split amounts by type with 0/1 mask multiplies instead of per-row branches
+    # or boolean gathers, so both sides are plain multiply-accumulate passes
+    is_income = type_codes.astype(np.int64)
+    income_cents = cents * is_income
+    expense_cents = abs_cents * (1 - is_income)
+
+    total_income = int(income_cents.sum())
+    total_expense = int(expense_cents.sum())
+
+    # bincount accumulates weights in float64, which is exact for whole cents below 2**53
+    cat_totals = np.bincount(cat_codes, weights=abs_cents, minlength=n_cats).astype(np.int64)
+    cat_counts = np.bincount(cat_codes, weights=counts, minlength=n_cats).astype(np.int64)
+
+    month_income = np.bincount(
+        month_codes, weights=income_cents, minlength=n_months
+    ).astype(np.int64)
+    month_expense = np.bincount(
+        month_codes, weights=expense_cents, minlength=n_months
+    ).astype(np.int64)
+    month_counts = np.bincount(month_codes, weights=counts, minlength=n_months).astype(np.int64)
+
+    return (total_income, total_expense, cat_totals, cat_counts,
+            month_income, month_expense, month_counts)
+
+
+def _top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """Return indices of the k largest values, largest first, in O(n)."""
+    if len(values) > k:
+        candidates = np.argpartition(-values, k - 1)[:k]
+    else:
+        candidates = np.arange(len(values))
+    # Break ties by position to keep results stable across calls
+    return candidates[np.lexsort((candidates, -values[candidates]))]
+
 
 class RealDataService:
     """Service for fetching real user financial data from the database."""
@@ -15,6 +115,18 @@ class RealDataService:
     def __init__(self, supabase_client: Client):
         self.supabase = supabase_client
 
+    def _tx_query_base(self, user_id: str, columns: str):
+        """Start a query over one user's transactions.
+        
+        supabase-py builders mutate themselves as filters are chained, so a
+        builder can't be cached and shared between requests. The immutable
+        query parameters for the invariant prefix are cached instead and
+        attached to a fresh builder.
+        """
+        query = self.supabase.table('transactions').select(columns)
+        query.request.params = _tx_query_params(columns, user_id)
+        return query
+
     async def get_user_profile(self, user_id: str) -> Optional[Dict]:
         """Get user profile data."""
         try:
@@ -24,127 +136,150 @@ class RealDataService:
             logger.error(f"Error fetching user profile: {e}")
             return None
 
-    async def get_user_transactions(self, user_id: str, days: int = 90) -> List[Dict]:
+    async def get_user_transactions(
+        self,
+        user_id: str,
+        days: int = 90,
+        columns: str = SUMMARY_COLUMNS
+    ) -> List[Dict]:
         """Get user transactions for the specified number of days."""
         try:
-            cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-            
-            result = self.supabase.table('transactions').select('*').eq('user_id', user_id).gte('date', cutoff_date).order('date', desc=True).execute()
-            
-            return result.data if result.data else []
+            return await self._fetch_user_transactions(user_id, days, columns)
         except Exception as e:
             logger.error(f"Error fetching user transactions: {e}")
             return []
 
+    @async_ttl_cache()
+    async def _fetch_user_transactions(self, user_id: str, days: int, columns: str) -> List[Dict]:
+        """Query a user's transactions; errors propagate so they are never cached."""
+        cutoff_date = (date.today() - timedelta(days=days)).isoformat()
+        
+        result = (self._tx_query_base(user_id, columns)
+                  .gte('date', cutoff_date)
+                  .order('date', desc=True)
+                  .limit(MAX_TRANSACTIONS_PER_QUERY)
+                  .execute())
+        
+        return result.data if result.data else []
+
+    async def get_daily_summary(self, user_id: str, days: int = 90) -> List[Dict]:
+        """Get a user's per-day totals by category and type, newest first.
+        
+        Reads the trigger-maintained `user_daily_summary` table, so the result has
+        one row per (day, category, type) rather than one per transaction.
+        Errors propagate to the caller.
+        """
+        cutoff_date = (date.today() - timedelta(days=days)).isoformat()
+        
+        result = (self.supabase.table('user_daily_summary')
+                  .select(DAILY_SUMMARY_COLUMNS)
+                  .eq('user_id', user_id)
+                  .gte('date', cutoff_date)
+                  .order('date', desc=True)
+                  .limit(MAX_TRANSACTIONS_PER_QUERY)
+                  .execute())
+        
+        return result.data if result.data else []
+
     async def get_financial_summary(self, user_id: str, days: int = 30) -> Dict:
         """Get comprehensive financial summary for a user."""
         try:
-            transactions = await self.get_user_transactions(user_id, days)
-            
-            if not transactions:
-                return self._get_empty_summary()
-            
-            # Calculate totals
-            total_income = Decimal('0')
-            total_expenses = Decimal('0')
-            category_breakdown = {}
-            monthly_data = {}
-            
-            for tx in transactions:
-                amount = Decimal(str(tx['amount']))
-                category = tx['category']
-                tx_type = tx['type']
-                tx_date = tx['date']
-                month_key = tx_date[:7]  # YYYY-MM
-                
-                # Track by type
-                if tx_type == 'income':
-                    total_income += amount
-                else:
-                    total_expenses += abs(amount)
-                
-                # Category breakdown
-                if category not in category_breakdown:
-                    category_breakdown[category] = {
-                        'total': Decimal('0'),
-                        'count': 0,
-                        'type': tx_type
-                    }
-                
-                category_breakdown[category]['total'] += abs(amount)
-                category_breakdown[category]['count'] += 1
-                
-                # Monthly breakdown
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = {
-                        'income': Decimal('0'),
-                        'expenses': Decimal('0'),
-                        'transactions': 0
-                    }
-                
-                if tx_type == 'income':
-                    monthly_data[month_key]['income'] += amount
-                else:
-                    monthly_data[month_key]['expenses'] += abs(amount)
-                monthly_data[month_key]['transactions'] += 1
-            
-            # Calculate metrics
-            net_savings = total_income - total_expenses
-            savings_rate = float(net_savings / total_income) if total_income > 0 else 0
-            
-            # Get top spending categories
-            top_categories = sorted(
-                [(cat, data) for cat, data in category_breakdown.items() if data['type'] == 'expense'],
-                key=lambda x: x[1]['total'],
-                reverse=True
-            )[:5]
-            
-            return {
-                'user_id': user_id,
-                'period_days': days,
-                'total_income': float(total_income),
-                'total_expenses': float(total_expenses),
-                'net_savings': float(net_savings),
-                'savings_rate': savings_rate,
-                'transaction_count': len(transactions),
-                'category_breakdown': {
-                    cat: {
-                        'total': float(data['total']),
-                        'count': data['count'],
-                        'type': data['type']
-                    }
-                    for cat, data in category_breakdown.items()
-                },
-                'top_expense_categories': [
-                    {
-                        'category': cat,
-                        'amount': float(data['total']),
-                        'count': data['count'],
-                        'percentage': float(data['total'] / total_expenses * 100) if total_expenses > 0 else 0
-                    }
-                    for cat, data in top_categories
-                ],
-                'monthly_data': {
-                    month: {
-                        'income': float(data['income']),
-                        'expenses': float(data['expenses']),
-                        'net': float(data['income'] - data['expenses']),
-                        'transactions': data['transactions']
-                    }
-                    for month, data in monthly_data.items()
-                },
-                'financial_health_score': self._calculate_health_score(
-                    savings_rate, 
-                    float(total_income), 
-                    len(category_breakdown)
-                ),
-                'generated_at': datetime.now().isoformat()
-            }
-            
+            return await self._build_financial_summary(user_id, days)
         except Exception as e:
             logger.error(f"Error generating financial summary: {e}")
             return self._get_empty_summary()
 
+    @async_ttl_cache()
+    async def _build_financial_summary(self, user_id: str, days: int) -> Dict:
+        """Compute a user's financial summary; errors propagate so they are never cached."""
+        # Read the clock once for the whole request
+        generated_at = datetime.now().isoformat()
+        rows = await self.get_daily_summary(user_id, days)
+        
+        if not rows:
+            return self._get_empty_summary(generated_at)
+        
+        # Convert rows to columns once so every aggregate is a contiguous scan.
+        # Sums are kept in integer cents and converted to currency once at the end
+        (raw_amounts, raw_abs_amounts, raw_counts,
+         raw_categories, raw_types, raw_dates) = zip(*map(_daily_summary_row, rows))
+        types = np.array(raw_types)
+        type_codes = (types == 'income').astype(np.int8)
+        cat_codes, cat_names, cat_first_rows = _factorize(np.array(raw_categories))
+        month_codes, months, _ = _factorize(np.array(raw_dates, dtype='U7'))  # YYYY-MM
+        cat_names = cat_names.tolist()
+        n_cats = len(cat_names)
+        
+        (income_cents, expense_cents, cat_totals, cat_counts,
+         month_income, month_expense, month_counts) = _aggregate(
+            _to_cents(raw_amounts), _to_cents(raw_abs_amounts),
+            np.array(raw_counts, dtype=np.int64), type_codes,
+            cat_codes, month_codes, n_cats, len(months)
+        )
+        transaction_count = int(cat_counts.sum())
+        
+        # A category takes the type of its most recent transaction
+        cat_types = types[cat_first_rows]
+        cat_types_list = cat_types.tolist()
+        
+        # Calculate metrics
+        total_income = income_cents / 100
+        total_expenses = expense_cents / 100
+        net_savings = (income_cents - expense_cents) / 100
+        savings_rate = net_savings / total_income if total_income > 0 else 0
+        
+        # Get top spending categories
+        expense_cats = np.flatnonzero(cat_types == 'expense')
+        top_categories = expense_cats[_top_k_indices(cat_totals[expense_cats], 5)]
+        
+        cat_totals_list = (cat_totals / 100).tolist()
+        cat_counts_list = cat_counts.tolist()
+        month_income_list = month_income.tolist()
+        month_expense_list = month_expense.tolist()
+        month_counts_list = month_counts.tolist()
+        
+        return {
+            'user_id': user_id,
+            'period_days': days,
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'net_savings': net_savings,
+            'savings_rate': savings_rate,
+            'transaction_count': transaction_count,
+            'category_breakdown': {
+                cat: {
+                    'total': cat_totals_list[i],
+                    'count': cat_counts_list[i],
+                    'type': cat_types_list[i]
+                }
+                for i, cat in enumerate(cat_names)
+            },
+            'top_expense_categories': [
+                {
+                    'category': cat_names[i],
+                    'amount': cat_totals_list[i],
+                    'count': cat_counts_list[i],
+                    'percentage': cat_totals_list[i] / total_expenses * 100 if total_expenses > 0 else 0
+                }
+                for i in top_categories.tolist()
+            ],
+            'monthly_data': {
+                month: {
+                    'income': month_income_list[i] / 100,
+                    'expenses': month_expense_list[i] / 100,
+                    'net': (month_income_list[i] - month_expense_list[i]) / 100,
+                    'transactions': month_counts_list[i]
+                }
+                for i, month in enumerate(months.tolist())
+            },
+            'financial_health_score': self._calculate_health_score(
+                savings_rate, 
+                total_income, 
+                n_cats
+            ),
+            'generated_at': generated_at
+        }
+
     def _calculate_health_score(self, savings_rate: float, income: float, category_diversity: int) -> float:
         """Calculate a financial health score (0-10)."""
         score = 5.0  # Base score
@@ -174,7 +309,7 @@ class RealDataService:
         # Cap at 10
         return min(10.0, score)
 
-    def _get_empty_summary(self) -> Dict:
+    def _get_empty_summary(self, generated_at: Optional[str] = None) -> Dict:
         """Return empty summary structure."""
         return {
             'total_income': 0,
@@ -186,81 +321,87 @@ class RealDataService:
             'top_expense_categories': [],
             'monthly_data': {},
             'financial_health_score': 0,
-            'generated_at': datetime.now().isoformat()
+            'generated_at': generated_at or datetime.now().isoformat()
         }
 
     async def get_spending_trends(self, user_id: str, days: int = 90) -> Dict:
         """Get spending trend analysis."""
         try:
-            transactions = await self.get_user_transactions(user_id, days)
-            
-            if not transactions:
-                return {'trends': [], 'insights': []}
+            return await self._build_spending_trends(user_id, days)
+        except Exception as e:
+            logger.error(f"Error getting spending trends: {e}")
+            return {'trends': [], 'insights': []}
+
+    @async_ttl_cache()
+    async def _build_spending_trends(self, user_id: str, days: int) -> Dict:
+        """Compute a user's weekly spending trends; errors propagate so they are never cached."""
+        transactions = await self._fetch_user_transactions(user_id, days, TRENDS_COLUMNS)
+        
+        if not transactions:
+            return {'trends': [], 'insights': []}
+        
+        # Group expenses by week (Monday start) with vectorized date math
+        raw_amounts, raw_types, raw_dates = zip(*map(_trends_row, transactions))
+        exp_mask = np.array(raw_types) == 'expense'
+        trends = []
+        if exp_mask.any():
+            days_since_epoch = np.array(raw_dates)[exp_mask].astype('datetime64[D]').astype(np.int64)
+            cents = np.abs(_to_cents(raw_amounts)[exp_mask])
             
-            # Group by week
-            weekly_data = {}
-            for tx in transactions:
-                if tx['type'] == 'expense':
-                    tx_date = datetime.strptime(tx['date'], '%Y-%m-%d').date()
-                    # Get week start (Monday)
-                    week_start = tx_date - timedelta(days=tx_date.weekday())
-                    week_key = week_start.strftime('%Y-W%U')
-                    
-                    if week_key not in weekly_data:
-                        weekly_data[week_key] = {
-                            'total': Decimal('0'),
-                            'count': 0,
-                            'start_date': week_start.strftime('%Y-%m-%d')
-                        }
-                    
-                    weekly_data[week_key]['total'] += abs(Decimal(str(tx['amount'])))
-                    weekly_data[week_key]['count'] += 1
+            # 1970-01-01 was a Thursday, so Monday-based weekday is (days + 3) % 7
+            week_starts = days_since_epoch - (days_since_epoch + 3) % 7
+            weeks, week_codes, week_counts = np.unique(
+                week_starts, return_inverse=True, return_counts=True
+            )
+            week_totals = np.bincount(
+                week_codes.ravel(), weights=cents, minlength=len(weeks)
+            ).astype(np.int64)
             
-            # Convert to trend data
-            trends = []
-            for week_key in sorted(weekly_data.keys()):
-                data = weekly_data[week_key]
+            # Convert to trend data (np.unique already sorts weeks chronologically)
+            week_dates = weeks.astype('datetime64[D]').tolist()
+            for week_start, total, count in zip(week_dates, week_totals.tolist(), week_counts.tolist()):
                 trends.append({
-                    'period': week_key,
-                    'start_date': data['start_date'],
-                    'total_spent': float(data['total']),
-                    'transaction_count': data['count'],
-                    'avg_transaction': float(data['total'] / data['count']) if data['count'] > 0 else 0
+                    'period': week_start.strftime('%Y-W%U'),
+                    'start_date': week_start.strftime('%Y-%m-%d'),
+                    'total_spent': total / 100,
+                    'transaction_count': count,
+                    'avg_transaction': total / (100 * count)
                 })
+        
+        # Generate insights
+        insights = []
+        if len(trends) >= 2:
+            latest_week = trends[-1]['total_spent']
+            previous_week = trends[-2]['total_spent']
             
-            # Generate insights
-            insights = []
-            if len(trends) >= 2:
-                latest_week = trends[-1]['total_spent']
-                previous_week = trends[-2]['total_spent']
-                
-                if latest_week > previous_week * 1.2:
-                    insights.append("Spending increased significantly this week (+20%)")
-                elif latest_week < previous_week * 0.8:
-                    insights.append("Good job! Spending decreased this week (-20%)")
-                
-                # Check for patterns
-                avg_spending = sum(t['total_spent'] for t in trends) / len(trends)
-                if latest_week > avg_spending * 1.3:
-                    insights.append("This week's spending is well above average")
-                elif latest_week < avg_spending * 0.7:
-                    insights.append("This week's spending is well below average")
-            
-            return {
-                'trends': trends,
-                'insights': insights,
-                'avg_weekly_spending': sum(t['total_spent'] for t in trends) / len(trends) if trends else 0
-            }
+            if latest_week > previous_week * 1.2:
+                insights.append("Spending increased significantly this week (+20%)")
+            elif latest_week < previous_week * 0.8:
+                insights.append("Good job! Spending decreased this week (-20%)")
             
-        except Exception as e:
-            logger.error(f"Error getting spending trends: {e}")
-            return {'trends': [], 'insights': []}
+            # Check for patterns
+            avg_spending = sum(t['total_spent'] for t in trends) / len(trends)
+            if latest_week > avg_spending * 1.3:
+                insights.append("This week's spending is well above average")
+            elif latest_week < avg_spending * 0.7:
+                insights.append("This week's spending is well below average")
+        
+        return {
+            'trends': trends,
+            'insights': insights,
+            'avg_weekly_spending': sum(t['total_spent'] for t in trends) / len(trends) if trends else 0
+        }
 
     async def get_available_users(self) -> List[Dict]:
         """Get list of available users in the database."""
         try:
-            result = self.supabase.table('users').select('id, email, full_name').execute()
-            return result.data if result.data else []
+            return await self._fetch_available_users()
         except Exception as e:
             logger.error(f"Error fetching available users: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    @async_ttl_cache(ttl=USERS_CACHE_TTL_SECONDS, per_user=False)
+    async def _fetch_available_users(self) -> List[Dict]:
+        """Query every user's id, email and name; errors propagate so they are never cached."""
+        result = self.supabase.table('users').select('id, email, full_name').execute()
+        return result.data if result.data else []
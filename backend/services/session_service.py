@@ -1,84 +1,137 @@
 """Session management service for financial advice conversations."""
 
+import heapq
 import logging
 import threading
-from typing import Dict, List, Tuple, Optional
-from datetime import datetime, timedelta
+import time
+from collections import deque
+from typing import Deque, Dict, List, Set, Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of lock shards; must be a power of two so a bit mask picks the shard
+LOCK_SHARDS = 16
 
 
 class SessionService:
     """Service for managing user sessions and chat histories."""
     
     def __init__(self, max_history_length: int = 10, session_timeout_hours: int = 24):
-        self.chat_histories: Dict[str, List[Tuple[str, str]]] = {}
-        self.session_timestamps: Dict[str, datetime] = {}
-        self.session_lock = threading.Lock()
+        self.chat_histories: Dict[str, Deque[Tuple[str, str]]] = {}
+        # Expiry per session as a time.monotonic() deadline, immune to wall-clock changes
+        self.session_expiries: Dict[str, float] = {}
         self.max_history_length = max_history_length
-        self.session_timeout = timedelta(hours=session_timeout_hours)
+        self.session_timeout_seconds = session_timeout_hours * 3600.0
+        
+        # Sessions are sharded across locks so unrelated chats don't serialize
+        self._locks = [threading.Lock() for _ in range(LOCK_SHARDS)]
+        
+        # Min-heap of (expiry, session_id) with at most one entry per session
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._scheduled: Set[str] = set()
+        self._heap_lock = threading.Lock()
+    
+    def _lock_for(self, session_id: str) -> threading.Lock:
+        """Get the lock shard guarding a session."""
+        return self._locks[hash(session_id) & (LOCK_SHARDS - 1)]
     
     def get_chat_history(self, session_id: str) -> List[Tuple[str, str]]:
         """Get chat history for a session."""
-        with self.session_lock:
-            self._cleanup_expired_sessions()
-            return self.chat_histories.get(session_id, [])
+        self._cleanup_expired_sessions()
+        with self._lock_for(session_id):
+            return list(self.chat_histories.get(session_id, ()))
     
     def add_to_history(self, session_id: str, question: str, answer: str) -> None:
         """Add a question-answer pair to session history."""
-        with self.session_lock:
-            if session_id not in self.chat_histories:
-                self.chat_histories[session_id] = []
+        with self._lock_for(session_id):
+            history = self.chat_histories.get(session_id)
+            if history is None:
+                # Bounded deque drops the oldest turn in O(1) once full
+                history = deque(maxlen=self.max_history_length)
+                self.chat_histories[session_id] = history
             
             # Add new conversation
-            self.chat_histories[session_id].append((question, answer))
-            
-            # Trim history if too long
-            if len(self.chat_histories[session_id]) > self.max_history_length:
-                self.chat_histories[session_id] = self.chat_histories[session_id][-self.max_history_length:]
+            history.append((question, answer))
             
-            # Update session timestamp
-            self.session_timestamps[session_id] = datetime.now()
+            # Push the session's expiry forward
+            expiry = time.monotonic() + self.session_timeout_seconds
+            self.session_expiries[session_id] = expiry
             
-            logging.info(f"Updated chat history for session {session_id}. Length: {len(self.chat_histories[session_id])}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Updated chat history for session {session_id}. Length: {len(history)}")
+        
+        with self._heap_lock:
+            if session_id not in self._scheduled:
+                self._scheduled.add(session_id)
+                heapq.heappush(self._expiry_heap, (expiry, session_id))
     
     def clear_session(self, session_id: str) -> bool:
         """Clear a specific session's history."""
-        with self.session_lock:
+        with self._lock_for(session_id):
             if session_id in self.chat_histories:
                 del self.chat_histories[session_id]
-                if session_id in self.session_timestamps:
-                    del self.session_timestamps[session_id]
-                logging.info(f"Cleared session: {session_id}")
+                if session_id in self.session_expiries:
+                    del self.session_expiries[session_id]
+                logger.info(f"Cleared session: {session_id}")
                 return True
             return False
     
     def get_active_sessions(self) -> List[str]:
         """Get list of active session IDs."""
-        with self.session_lock:
-            self._cleanup_expired_sessions()
-            return list(self.chat_histories.keys())
+        self._cleanup_expired_sessions()
+        return list(self.chat_histories.keys())
     
     def _cleanup_expired_sessions(self) -> None:
-        """Remove expired sessions (internal method, should be called with lock)."""
-        current_time = datetime.now()
-        expired_sessions = [
-            session_id for session_id, timestamp in self.session_timestamps.items()
-            if current_time - timestamp > self.session_timeout
-        ]
+        """Remove expired sessions (internal method, must be called without shard locks held).
         
-        for session_id in expired_sessions:
-            if session_id in self.chat_histories:
-                del self.chat_histories[session_id]
-            if session_id in self.session_timestamps:
-                del self.session_timestamps[session_id]
-            logging.info(f"Cleaned up expired session: {session_id}")
+        Heap entries are checked lazily: a session whose expiry moved on
+        since it was scheduled is re-queued at its new expiry instead of removed.
+        """
+        current_time = time.monotonic()
+        
+        with self._heap_lock:
+            if not self._expiry_heap or self._expiry_heap[0][0] >= current_time:
+                return
+            due_sessions = []
+            while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+                due_sessions.append(heapq.heappop(self._expiry_heap)[1])
+        
+        requeue = []
+        for session_id in due_sessions:
+            with self._lock_for(session_id):
+                expiry = self.session_expiries.get(session_id)
+                if expiry is not None and expiry >= current_time:
+                    requeue.append((expiry, session_id))
+                    continue
+                
+                if session_id in self.chat_histories:
+                    del self.chat_histories[session_id]
+                if session_id in self.session_expiries:
+                    del self.session_expiries[session_id]
+            if expiry is not None:
+                logger.info(f"Cleaned up expired session: {session_id}")
+        
+        with self._heap_lock:
+            requeued_ids = {session_id for _, session_id in requeue}
+            for session_id in due_sessions:
+                if session_id in requeued_ids:
+                    continue
+                # The session may have been recreated while we were cleaning up
+                expiry = self.session_expiries.get(session_id)
+                if expiry is not None:
+                    requeue.append((expiry, session_id))
+                else:
+                    self._scheduled.discard(session_id)
+            for entry in requeue:
+                heapq.heappush(self._expiry_heap, entry)
     
     def get_session_stats(self) -> Dict[str, int]:
         """Get session statistics."""
-        with self.session_lock:
-            self._cleanup_expired_sessions()
-            total_conversations = sum(len(history) for history in self.chat_histories.values())
-            return {
-                "active_sessions": len(self.chat_histories),
-                "total_conversations": total_conversations,
-                "max_history_length": self.max_history_length
-            }
\ No newline at end of file
+        self._cleanup_expired_sessions()
+        histories = list(self.chat_histories.values())
+        total_conversations = sum(len(history) for history in histories)
+        return {
+            "active_sessions": len(histories),
+            "total_conversations": total_conversations,
+            "max_history_length": self.max_history_length
+        }
@@ -1,15 +1,34 @@
 """Supabase client configuration and database operations."""
 
 import logging
+import time
 from typing import Optional, Dict, Any, List
+
+import httpx
 from supabase import create_client, Client
-from supabase.lib.client_options import ClientOptions
+from supabase.lib.client_options import SyncClientOptions
 from postgrest.exceptions import APIError
 
 from config.settings import get_settings
+from services.cache_service import invalidate_user_cache
 
 logger = logging.getLogger(__name__)
 
+# Health probes reuse the last result for this long instead of hitting Supabase
+HEALTH_CHECK_CACHE_SECONDS = 10.0
+HEALTH_CHECK_TIMEOUT_SECONDS = 1.0
+
+# Pool shared by PostgREST/storage and the health probe. Queries run one at a
+# time on the event loop thread and HTTP/2 multiplexes them over one kept-alive
+# connection, so the pool only has to hold that connection and a spare
+SUPABASE_HTTP_LIMITS = httpx.Limits(
+    max_connections=4,
+    max_keepalive_connections=2,
+    keepalive_expiry=30.0
+)
+# Matches supabase-py's default PostgREST timeout, which a custom client replaces
+SUPABASE_HTTP_TIMEOUT_SECONDS = 120.0
+
 
 class SupabaseClient:
     """Supabase client wrapper for database operations."""
@@ -17,7 +36,10 @@ class SupabaseClient:
     def __init__(self):
         """Initialize Supabase client."""
         self._client: Optional[Client] = None
+        self._http_client: Optional[httpx.Client] = None
         self._settings = get_settings()
+        self._health_result: Optional[Dict[str, Any]] = None
+        self._health_checked_at = 0.0
         
     @property
     def client(self) -> Client:
@@ -26,12 +48,24 @@ class SupabaseClient:
             self._client = self._create_client()
         return self._client
     
+    @property
+    def http_client(self) -> httpx.Client:
+        """Get or create the pooled HTTP client shared with the Supabase client."""
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                limits=SUPABASE_HTTP_LIMITS,
+                timeout=SUPABASE_HTTP_TIMEOUT_SECONDS,
+                http2=True
+            )
+        return self._http_client
+    
     def _create_client(self) -> Client:
         """Create a new Supabase client."""
         try:
-            options = ClientOptions(
+            options = SyncClientOptions(
                 auto_refresh_token=True,
                 persist_session=True,
+                httpx_client=self.http_client,
             )
             
             client = create_client(
@@ -48,28 +82,47 @@ class SupabaseClient:
             raise
     
     def health_check(self) -> Dict[str, Any]:
-        """Check Supabase connection health."""
+        """Check Supabase connection health.
+        
+        Sends a HEAD request to the REST root over the pooled HTTP client
+        rather than querying a table, and reuses the result for `HEALTH_CHECK_CACHE_SECONDS` so frequent probes
+        don't turn into database round trips.
+        """
+        now = time.monotonic()
+        if self._health_result is not None and now - self._health_checked_at < HEALTH_CHECK_CACHE_SECONDS:
+            return self._health_result
+        
         try:
-            # Simple query to test connection
-            response = self.client.table('users').select('count').execute()
-            return {
+            api_key = self._settings.supabase_service_key or self._settings.supabase_key
+            response = self.http_client.head(
+                f"{self._settings.supabase_url.rstrip('/')}/rest/v1/",
+                headers={"apikey": api_key, "Authorization": f"Bearer {api_key}"},
+                timeout=HEALTH_CHECK_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+            result = {
                 "status": "healthy",
                 "connection": "active",
                 "response_time": "fast"
             }
         except Exception as e:
             logger.error(f"Supabase health check failed: {e}")
-            return {
+            result = {
                 "status": "unhealthy",
                 "connection": "failed", 
                 "error": str(e)
             }
+        
+        self._health_result = result
+        self._health_checked_at = now
+        return result
     
     # Transaction operations
     async def create_transaction(self, transaction_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new transaction."""
         try:
             response = self.client.table('transactions').insert(transaction_data).execute()
+            invalidate_user_cache(transaction_data.get('user_id'))
             return response.data[0] if response.data else {}
         except APIError as e:
             logger.error(f"Failed to create transaction: {e}")
@@ -162,6 +215,8 @@ class SupabaseClient:
                 .update(update_data)\
                 .eq('id', transaction_id)\
                 .execute()
+            if response.data:
+                invalidate_user_cache(response.data[0].get('user_id'))
             return response.data[0] if response.data else {}
         except APIError as e:
             logger.error(f"Failed to update transaction: {e}")
@@ -170,10 +225,12 @@ class SupabaseClient:
     async def delete_transaction(self, transaction_id: str) -> bool:
         """Delete a transaction."""
         try:
-            self.client.table('transactions')\
+            response = self.client.table('transactions')\
                 .delete()\
                 .eq('id', transaction_id)\
                 .execute()
+            for row in response.data or []:
+                invalidate_user_cache(row.get('user_id'))
             return True
         except APIError as e:
             logger.error(f"Failed to delete transaction: {e}")
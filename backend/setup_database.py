@@ -2,17 +2,38 @@
 """
 Complete database setup script.
 Creates schema and populates with mock data in one step.
+
+Connections: SUPABASE_DB_URL (or DATABASE_URL) is the direct Postgres
+connection and SUPABASE_DB_POOLER_URL the PgBouncer transaction-mode pooler
+(port 6543). Bulk loads prefer the pooler, since each runs in a single
+transaction and needs no session state; schema changes always use the direct
+connection. With neither set, everything goes through PostgREST.
 """
 
+import argparse
 import asyncio
+import contextlib
+import functools
 import os
 import logging
-from datetime import datetime
-from typing import List
+import re
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from operator import attrgetter
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
 from dotenv import load_dotenv
 
+import asyncpg
+import httpx
+import numpy as np
+import orjson
 from supabase import create_client, Client
-from services.mock_data_service import MockDataService
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from services.cache_service import clear_all_caches
+from services.mock_data_service import MockDataService, get_mock_data_service
 from core.models import UserProfile, Transaction
 
 # Load environment variables
@@ -22,12 +43,189 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Records per insert request; larger batches amortize the PostgREST round trip,
+# with little gain past a few thousand rows
+DEFAULT_SEED_BATCH_SIZE = 5000
+
+# Responses meaning a request was too large; such batches are halved and resent
+PAYLOAD_TOO_LARGE_STATUSES = (413, 414)
+
+# Seeds with at most this many transactions skip COPY; a direct connection isn't worth it
+COPY_THRESHOLD = 100
+
+# Insert requests in flight at once; gains flatten out past 4-8
+DEFAULT_SEED_CONCURRENCY = 8
+
+# Attempts per batch before a failing batch is split up
+MAX_INSERT_ATTEMPTS = 3
+
+# Timeout for a single PostgREST insert request
+INSERT_TIMEOUT_SECONDS = 30.0
+
+# Successful batches are logged at INFO only every this many batches
+BATCH_LOG_INTERVAL = 10
+
+# Smallest currency unit, matching the DECIMAL(15,2) amount column
+CENT = Decimal('0.01')
+
+# Precompiled validators so per-record checks run in C
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+ID_RE = re.compile(r"^\S{3,}$")
+# Matches plain types and serialized enums like 'TransactionType.EXPENSE'
+TYPE_RE = re.compile(r"(?:^|\.)(income|expense)$", re.I)
+
+# Pulls every field needed for an insert row from a Transaction in one call
+_transaction_fields = attrgetter(
+    'id', 'user_id', 'amount', 'description', 'category', 'type', 'transaction_date', 'created_at'
+)
+
+# Columns loaded with COPY, in the order of the CREATE TABLE statements
+USER_COLUMNS = ('id', 'email', 'full_name', 'created_at', 'preferences')
+
+# Pulls a user's fields in `USER_COLUMNS` order in one call
+_user_fields = attrgetter(*USER_COLUMNS)
+TRANSACTION_COLUMNS = ('id', 'user_id', 'amount', 'description', 'category', 'type', 'date', 'created_at')
+
+
+# Row trigger keeping user_daily_summary in step with transactions (schema.sql)
+SUMMARY_TRIGGER = 'apply_user_daily_summary_delta'
+
+# Full schema (tables, RLS policies, summary table, RPC functions). Both the
+# direct connection and the exec_sql RPC fallback apply this same file.
+SCHEMA_FILE = Path(__file__).with_name('schema.sql')
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_date_cached(date_obj, field_name: str) -> str:
+    """Format a date, datetime or date string as an ISO string.
+    
+    Seed data repeats the same dates and timestamps heavily, so results are
+    cached per distinct value.
+    """
+    if date_obj is None:
+        raise ValueError(f"{field_name} is None")
+    
+    if hasattr(date_obj, 'isoformat'):
+        return date_obj.isoformat()
+    elif isinstance(date_obj, str):
+        # Try to parse string date and convert to ISO format
+        try:
+            if 'T' in date_obj:  # Already in ISO format or datetime
+                return date_obj.split('T')[0]  # Extract date part
+            else:
+                # Assume it's already in YYYY-MM-DD format
+                datetime.strptime(date_obj, "%Y-%m-%d")  # Validate format
+                return date_obj
+        except ValueError:
+            raise ValueError(f"Invalid {field_name} format: {date_obj}")
+    else:
+        raise ValueError(f"Invalid {field_name} type: {type(date_obj)}")
+
+
+@dataclass(slots=True)
+class TransactionRow:
+    """A transaction insert row.
+    
+    Seeds hold every row in memory at once, and slotted instances are much
+    smaller than dicts. orjson serializes them directly. Missing fields
+    default to None so validation can report them.
+    """
+    id: Optional[str] = None
+    user_id: Optional[str] = None
+    amount: Optional[Decimal] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    type: Optional[str] = None
+    date: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+def _to_amount(value) -> Decimal:
+    """Convert an amount to a Decimal rounded to cents; NaN and infinities pass through."""
+    amount = Decimal(str(value))
+    return amount.quantize(CENT) if amount.is_finite() else amount
+
+
+def _json_default(value):
+    """Serialize values orjson doesn't handle natively, keeping Decimals exact."""
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date(value: str) -> date:
+    """Parse an ISO date; cached because seed rows share few distinct dates."""
+    return date.fromisoformat(value)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_timestamp(value: str) -> datetime:
+    """Parse an ISO timestamp, treating naive values as UTC like PostgREST does.
+    
+    Cached like `_parse_date`; mock rows loaded together share one timestamp.
+    """
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _user_record(user_dict: dict) -> tuple:
+    """Convert a validated user dict to a COPY record in `USER_COLUMNS` order."""
+    return (
+        user_dict['id'],
+        user_dict['email'],
+        user_dict['full_name'],
+        _parse_timestamp(user_dict['created_at']),
+        # asyncpg takes jsonb as text
+        orjson.dumps(user_dict['preferences']).decode()
+    )
+
+
+def _transaction_record(row: TransactionRow) -> tuple:
+    """Convert a validated transaction row to a COPY record in `TRANSACTION_COLUMNS` order."""
+    return (
+        row.id,
+        row.user_id,
+        row.amount,
+        row.description,
+        row.category,
+        row.type,
+        _parse_date(row.date),
+        _parse_timestamp(row.created_at)
+    )
+
+
+def _shard_of(user_id: str, num_shards: int) -> int:
+    """Pick a user's shard with a hash that is stable across processes, unlike hash()."""
+    return zlib.crc32(user_id.encode()) % num_shards
+
+
+def _content_range_total(response: httpx.Response) -> int:
+    """Read the exact row count from a PostgREST Content-Range header like `0-2/252`."""
+    total = response.headers.get('content-range', '*/0').rsplit('/', 1)[-1]
+    return int(total) if total.isdigit() else 0
+
+
+def _record_id(record) -> Optional[str]:
+    """Get the ID of a user dict or a transaction row."""
+    return record.get('id') if isinstance(record, dict) else record.id
+
 
 class DatabaseSetup:
     """Complete database setup including schema creation and data population."""
     
-    def __init__(self):
-        """Initialize database setup."""
+    USER_REQUIRED_FIELDS = ('id', 'email', 'full_name')
+    TRANSACTION_REQUIRED_FIELDS = ('id', 'user_id', 'amount', 'description', 'category', 'type', 'date')
+    
+    def __init__(self, shard: int = 0, num_shards: int = 1):
+        """Initialize database setup.
+        
+        With `num_shards` > 1 only the users in `shard` (and their transactions)
+        are seeded, so several runs can load one database in parallel.
+        """
+        if not 0 <= shard < num_shards:
+            raise ValueError(f"Shard {shard} is out of range for {num_shards} shards")
+        
         # Get environment variables
         supabase_url = os.getenv("SUPABASE_URL", "http://127.0.0.1:54321")
         
@@ -39,85 +237,65 @@ class DatabaseSetup:
             supabase_url=supabase_url,
             supabase_key=service_role_key  # Use service role instead of anon key
         )
-        self.mock_service = MockDataService()
+        # Seed inserts and checks call PostgREST directly with httpx, without blocking the loop
+        self.rest_url = f"{supabase_url}/rest/v1"
+        self.rest_headers = {
+            'apikey': service_role_key,
+            'Authorization': f"Bearer {service_role_key}",
+            'Content-Type': 'application/json'
+        }
+        # Created on first use by _get_rest_client and shared by every request
+        self._rest_client: Optional[httpx.AsyncClient] = None
+        # Shared instance, so mock files already parsed elsewhere in the process are reused
+        self.mock_service: MockDataService = get_mock_data_service()
+        # Loaded once and shared by every populate step
+        self.num_shards = num_shards
+        self._users: List[UserProfile] = [
+            user for user in self.mock_service.get_mock_users()
+            if num_shards == 1 or _shard_of(user.id, num_shards) == shard
+        ]
+        self.batch_size = int(os.getenv("SEED_BATCH_SIZE", DEFAULT_SEED_BATCH_SIZE))
+        self.concurrency = int(os.getenv("SEED_CONCURRENCY", DEFAULT_SEED_CONCURRENCY))
+        
+        # Direct Postgres connection for COPY; opened in setup_complete_database
+        self.db_conn: Optional[asyncpg.Connection] = None
         
         logger.info(f"🔧 Using Supabase URL: {supabase_url}")
         logger.info("🔑 Using SERVICE ROLE key for data seeding (bypasses RLS)")
+        if num_shards > 1:
+            logger.info(f"🧩 Seeding shard {shard + 1}/{num_shards}: {len(self._users)} users")
+
+    def _get_rest_client(self) -> httpx.AsyncClient:
+        """Get the shared PostgREST client, creating it on first use.
+        
+        One HTTP/2 client serves every seed request, so concurrent batches
+        multiplex over a kept-alive connection instead of each opening their own.
+        """
+        if self._rest_client is None or self._rest_client.is_closed:
+            self._rest_client = httpx.AsyncClient(
+                base_url=self.rest_url,
+                headers=self.rest_headers,
+                timeout=INSERT_TIMEOUT_SECONDS,
+                http2=True
+            )
+        return self._rest_client
+    
+    async def close(self) -> None:
+        """Close the shared PostgREST client."""
+        if self._rest_client is not None:
+            await self._rest_client.aclose()
+            self._rest_client = None
 
     def create_schema(self) -> bool:
-        """Create the database schema using SQL commands."""
+        """Create the database schema by running schema.sql through the exec_sql RPC."""
         logger.info("🗄️ Creating database schema...")
         
-        # Schema SQL commands
-        schema_commands = [
-            # Drop existing tables if they exist
-            "DROP TABLE IF EXISTS public.transactions CASCADE;",
-            "DROP TABLE IF EXISTS public.users CASCADE;",
-            
-            # Create users table
-            """
-            CREATE TABLE public.users (
-                id TEXT PRIMARY KEY,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                full_name VARCHAR(255) NOT NULL,
-                created_at TIMESTAMPTZ DEFAULT NOW(),
-                updated_at TIMESTAMPTZ DEFAULT NOW(),
-                preferences JSONB DEFAULT '{}'::jsonb
-            );
-            """,
-            
-            # Create transactions table
-            """
-            CREATE TABLE public.transactions (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
-                amount DECIMAL(15,2) NOT NULL,
-                description TEXT NOT NULL,
-                category VARCHAR(100) NOT NULL,
-                type VARCHAR(20) NOT NULL CHECK (type IN ('income', 'expense')),
-                date DATE NOT NULL,
-                created_at TIMESTAMPTZ DEFAULT NOW(),
-                updated_at TIMESTAMPTZ DEFAULT NOW()
-            );
-            """,
-            
-            # Create indexes for better performance
-            "CREATE INDEX idx_transactions_user_id ON public.transactions(user_id);",
-            "CREATE INDEX idx_transactions_date ON public.transactions(date);",
-            "CREATE INDEX idx_transactions_type ON public.transactions(type);",
-            "CREATE INDEX idx_transactions_category ON public.transactions(category);",
-            
-            # Create updated_at trigger function
-            """
-            CREATE OR REPLACE FUNCTION public.update_updated_at_column()
-            RETURNS TRIGGER AS $$
-            BEGIN
-                NEW.updated_at = NOW();
-                RETURN NEW;
-            END;
-            $$ LANGUAGE plpgsql;
-            """,
-            
-            # Create triggers
-            """
-            CREATE TRIGGER update_users_updated_at
-                BEFORE UPDATE ON public.users
-                FOR EACH ROW EXECUTE FUNCTION public.update_updated_at_column();
-            """,
-            
-            """
-            CREATE TRIGGER update_transactions_updated_at
-                BEFORE UPDATE ON public.transactions
-                FOR EACH ROW EXECUTE FUNCTION public.update_updated_at_column();
-            """
-        ]
-        
+        # One RPC runs in one transaction, so a failing command rolls back the whole schema
         try:
-            for i, command in enumerate(schema_commands, 1):
-                logger.info(f"  Executing schema command {i}/{len(schema_commands)}...")
-                result = self.supabase.rpc('exec_sql', {'sql': command}).execute()
-                if hasattr(result, 'data') and result.data:
-                    logger.info(f"    ✅ Command {i} executed successfully")
+            logger.info(f"  Executing {SCHEMA_FILE.name} in one call...")
+            result = self.supabase.rpc('exec_sql', {'sql': SCHEMA_FILE.read_text()}).execute()
+            if hasattr(result, 'data') and result.data:
+                logger.info("    ✅ Schema commands executed successfully")
                     
             logger.info("✅ Database schema created successfully!")
             return True
@@ -126,19 +304,50 @@ class DatabaseSetup:
             logger.error(f"❌ Failed to create database schema: {e}")
             return False
 
+    async def create_schema_async(self) -> bool:
+        """Create the database schema, over a direct Postgres connection when available.
+        
+        With a direct connection the bundled schema.sql is applied. Without
+        one this falls back to the exec_sql RPC in `create_schema`.
+        """
+        conn = await self._connect_db(direct=True)
+        if conn is None:
+            return await asyncio.to_thread(self.create_schema)
+        
+        try:
+            return await self._apply_schema_file(conn)
+        finally:
+            await conn.close()
+    
+    async def _apply_schema_file(self, conn: asyncpg.Connection) -> bool:
+        """Run schema.sql over a direct connection.
+        
+        The whole file goes out in one round trip inside an explicit
+        transaction, so a failing statement rolls all of it back and the
+        connection is left usable.
+        """
+        logger.info(f"🗄️ Applying {SCHEMA_FILE.name} in one transaction...")
+        try:
+            async with conn.transaction():
+                await conn.execute(SCHEMA_FILE.read_text())
+            logger.info("✅ Database schema created successfully!")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to create database schema: {e}")
+            return False
+
     def _validate_user_data(self, user_dict: dict) -> bool:
         """Validate user data for required fields and formats."""
-        required_fields = ['id', 'email', 'full_name']
-        
         # Check for missing required fields
-        for field in required_fields:
+        for field in self.USER_REQUIRED_FIELDS:
             if field not in user_dict or not user_dict[field]:
                 logger.warning(f"  ⚠️  Missing required field '{field}' in user data")
                 return False
         
         # Validate email format
         email = str(user_dict['email']).strip().lower()
-        if '@' not in email or '.' not in email.split('@')[1]:
+        if not EMAIL_RE.match(email):
             logger.warning(f"  ⚠️  Invalid email format: {email}")
             return False
         user_dict['email'] = email
@@ -152,7 +361,7 @@ class DatabaseSetup:
         
         # Validate ID format
         user_id = str(user_dict['id']).strip()
-        if len(user_id) < 3 or ' ' in user_id:
+        if not ID_RE.match(user_id):
             logger.warning(f"  ⚠️  Invalid user ID format: '{user_id}'")
             return False
         
@@ -165,35 +374,39 @@ class DatabaseSetup:
         
         return True
     
-    def populate_users(self) -> bool:
-        """Populate users table with mock data."""
+    def _prepare_users(self) -> Tuple[List[dict], int]:
+        """Build and validate the user rows to insert, returning `(rows, skipped)`."""
+        users_data = []
+        skipped_users = 0
+        
+        for user in self._users:
+            try:
+                user_dict = dict(zip(USER_COLUMNS, _user_fields(user)))
+                user_dict['created_at'] = user_dict['created_at'].isoformat()
+                
+                # Validate user data
+                if self._validate_user_data(user_dict):
+                    users_data.append(user_dict)
+                else:
+                    skipped_users += 1
+                    
+            except (AttributeError, ValueError, TypeError) as e:
+                logger.warning(f"  ⚠️  Skipping invalid user {getattr(user, 'email', 'unknown')}: {e}")
+                skipped_users += 1
+                continue
+        
+        return users_data, skipped_users
+    
+    async def populate_users(self, prepared: Optional[Tuple[List[dict], int]] = None) -> bool:
+        """Populate users table with mock data.
+        
+        `prepared` is the result of `_prepare_users` when the rows were built
+        ahead of time; otherwise they are built here.
+        """
         logger.info("👥 Populating users table...")
         
         try:
-            users = self.mock_service.get_mock_users()
-            users_data = []
-            skipped_users = 0
-            
-            for user in users:
-                try:
-                    user_dict = {
-                        'id': user.id,
-                        'email': user.email,
-                        'full_name': user.full_name,
-                        'created_at': user.created_at.isoformat(),
-                        'preferences': user.preferences
-                    }
-                    
-                    # Validate user data
-                    if self._validate_user_data(user_dict):
-                        users_data.append(user_dict)
-                    else:
-                        skipped_users += 1
-                        
-                except (AttributeError, ValueError, TypeError) as e:
-                    logger.warning(f"  ⚠️  Skipping invalid user {getattr(user, 'email', 'unknown')}: {e}")
-                    skipped_users += 1
-                    continue
+            users_data, skipped_users = prepared if prepared is not None else self._prepare_users()
             
             if skipped_users > 0:
                 logger.warning(f"⚠️  Skipped {skipped_users} invalid users")
@@ -202,11 +415,14 @@ class DatabaseSetup:
                 logger.error("❌ No valid users to insert")
                 return False
             
-            # Insert users with retry mechanism
-            inserted_count = self._safe_batch_insert('users', users_data, 1)
+            # Insert users in batches with retry mechanism
+            inserted_count = await self._insert_records('users', users_data, USER_COLUMNS, _user_record)
             
             if inserted_count > 0:
-                logger.info(f"✅ Inserted {inserted_count} users successfully!")
+                # One summary line instead of a line per user
+                preview = ", ".join(user['email'] for user in users_data[:5])
+                more = " …" if len(users_data) > 5 else ""
+                logger.info(f"✅ Inserted {inserted_count} users successfully: {preview}{more}")
                 if skipped_users > 0:
                     logger.info(f"📊 Process completed successfully despite {skipped_users} invalid users")
                 return True
@@ -220,184 +436,386 @@ class DatabaseSetup:
 
     def _safe_format_date(self, date_obj, field_name: str = "date") -> str:
         """Safely format a date object to ISO format string."""
-        if date_obj is None:
-            raise ValueError(f"{field_name} is None")
-        
-        if hasattr(date_obj, 'isoformat'):
-            return date_obj.isoformat()
-        elif isinstance(date_obj, str):
-            # Try to parse string date and convert to ISO format
-            try:
-                if 'T' in date_obj:  # Already in ISO format or datetime
-                    return date_obj.split('T')[0]  # Extract date part
-                else:
-                    # Assume it's already in YYYY-MM-DD format
-                    datetime.strptime(date_obj, "%Y-%m-%d")  # Validate format
-                    return date_obj
-            except ValueError:
-                raise ValueError(f"Invalid {field_name} format: {date_obj}")
-        else:
+        try:
+            return _format_date_cached(date_obj, field_name)
+        except TypeError:
+            # Unhashable values can't be cached and aren't dates anyway
             raise ValueError(f"Invalid {field_name} type: {type(date_obj)}")
     
-    def _validate_transaction_data(self, tx_dict: dict, user_email: str) -> bool:
-        """Validate transaction data for required fields and data integrity."""
-        required_fields = ['id', 'user_id', 'amount', 'description', 'category', 'type', 'date']
+    def _validate_transaction_data(self, row: TransactionRow, user_email: str) -> bool:
+        """Validate transaction data for required fields and data integrity.
         
+        Amount signs are not touched here; _build_transaction_rows already
+        stores expenses negative and income positive.
+        """
         # Check for missing required fields
-        for field in required_fields:
-            if field not in tx_dict or tx_dict[field] is None:
+        for field in self.TRANSACTION_REQUIRED_FIELDS:
+            if getattr(row, field) is None:
                 logger.warning(f"  ⚠️  Missing required field '{field}' for {user_email}")
                 return False
         
         # Validate field types and values
         try:
-            # Check amount is a valid number
-            amount = float(tx_dict['amount'])
-            if not isinstance(amount, (int, float)):
-                logger.warning(f"  ⚠️  Invalid amount type '{tx_dict['amount']}' for {user_email}")
+            # Check amount is a finite number; rows from _build_transaction_rows are already Decimal
+            amount = row.amount
+            if not isinstance(amount, Decimal):
+                amount = _to_amount(amount)
+            if not amount.is_finite():
+                logger.warning(f"  ⚠️  Invalid amount '{row.amount}' for {user_email}")
                 return False
+            row.amount = amount
             
-            # Warn about zero amounts but allow them
-            if amount == 0:
-                logger.info(f"  ℹ️  Zero amount transaction for {user_email}: {tx_dict.get('description', 'No description')}")
+            # Allow zero amounts; populate_transactions reports how many there were
+            if amount == 0 and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"  ℹ️  Zero amount transaction for {user_email}: {row.description}")
             
             # Check description is not empty
-            description = str(tx_dict['description']).strip()
+            description = str(row.description).strip()
             if not description or len(description) > 255:
                 logger.warning(f"  ⚠️  Invalid description length for {user_email}: '{description[:50]}...'")
                 return False
-            tx_dict['description'] = description
+            row.description = description
             
             # Check category is not empty
-            category = str(tx_dict['category']).strip().lower()
+            category = str(row.category).strip().lower()
             if not category:
                 logger.warning(f"  ⚠️  Empty category for {user_email}")
                 return False
-            tx_dict['category'] = category
+            row.category = category
             
             # Check transaction type is valid (handle enum serialization)
-            tx_type = str(tx_dict['type']).strip().lower()
-            # Handle enum format like 'transactiontype.expense' -> 'expense'
-            if '.' in tx_type:
-                tx_type = tx_type.split('.')[-1]
-            
-            if tx_type not in ['income', 'expense']:
-                logger.warning(f"  ⚠️  Invalid transaction type '{tx_dict['type']}' -> '{tx_type}' for {user_email}")
+            type_match = TYPE_RE.search(str(row.type).strip())
+            if not type_match:
+                logger.warning(f"  ⚠️  Invalid transaction type '{row.type}' for {user_email}")
                 return False
-            tx_dict['type'] = tx_type
-            
-            # Validate amount sign matches type
-            if tx_type == 'expense' and amount > 0:
-                tx_dict['amount'] = -abs(amount)  # Auto-correct negative expenses
-            elif tx_type == 'income' and amount < 0:
-                tx_dict['amount'] = abs(amount)   # Auto-correct positive income
+            tx_type = type_match.group(1).lower()
+            row.type = tx_type
             
             # Check ID is not empty
-            if not str(tx_dict['id']).strip():
+            if not str(row.id).strip():
                 logger.warning(f"  ⚠️  Empty transaction ID for {user_email}")
                 return False
             
             return True
             
-        except (ValueError, TypeError) as e:
+        except (ValueError, TypeError, ArithmeticError) as e:
             logger.warning(f"  ⚠️  Data validation error for {user_email}: {e}")
             return False
     
-    def _safe_batch_insert(self, table_name: str, batch: list, batch_num: int) -> int:
-        """Safely insert a batch with retry mechanism and partial recovery."""
-        max_retries = 3
-        inserted_count = 0
+    async def _connect_db(self, direct: bool = False) -> Optional[asyncpg.Connection]:
+        """Open a Postgres connection, or return None if no URL is configured.
+        
+        Uses SUPABASE_DB_POOLER_URL when set unless `direct` is requested, and
+        SUPABASE_DB_URL (or DATABASE_URL) otherwise.
+        """
+        pooler_url = None if direct else os.getenv("SUPABASE_DB_POOLER_URL")
+        db_url = pooler_url or os.getenv("SUPABASE_DB_URL") or os.getenv("DATABASE_URL")
+        if not db_url:
+            logger.info("ℹ️  SUPABASE_DB_URL not set - using PostgREST")
+            return None
+        
+        try:
+            if pooler_url:
+                # Transaction-mode PgBouncer can't keep prepared statements across transactions
+                conn = await asyncpg.connect(pooler_url, statement_cache_size=0)
+                logger.info("🔌 Connected to Postgres through the connection pooler")
+            else:
+                conn = await asyncpg.connect(db_url)
+                logger.info("🔌 Connected directly to Postgres")
+            return conn
+        except Exception as e:
+            logger.warning(f"⚠️  Direct Postgres connection failed, inserting through PostgREST: {e}")
+            return None
+    
+    async def _copy_insert(self, table_name: str, records: Iterable[tuple], columns: Sequence[str]) -> int:
+        """Bulk load records into a table with COPY, skipping IDs that already exist.
+        
+        Records are copied into a temporary staging table and then moved over
+        with `INSERT ... ON CONFLICT (id) DO NOTHING`, so reruns are idempotent.
+        `records` may be a generator; COPY consumes it as it streams.
+        Returns the number of new rows.
+        """
+        staging_table = f"seed_{table_name}"
+        column_list = ", ".join(columns)
         
-        for attempt in range(max_retries):
+        async with self.db_conn.transaction():
+            await self.db_conn.execute(
+                f"CREATE TEMP TABLE {staging_table} (LIKE public.{table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            await self.db_conn.copy_records_to_table(staging_table, records=records, columns=columns)
+            status = await self.db_conn.execute(
+                f"INSERT INTO public.{table_name} ({column_list}) "
+                f"SELECT {column_list} FROM {staging_table} ON CONFLICT (id) DO NOTHING"
+            )
+        # Status is the command tag, e.g. "INSERT 0 1200"
+        return int(status.split()[-1])
+    
+    async def _insert_records(
+        self,
+        table_name: str,
+        records: list,
+        columns: Sequence[str],
+        to_record: Callable[[dict], tuple]
+    ) -> int:
+        """Insert records with COPY when connected directly, else through PostgREST."""
+        if self.db_conn is not None:
             try:
-                result = self.supabase.table(table_name).insert(batch).execute()
-                if result.data:
-                    inserted_count = len(result.data)
-                    logger.info(f"  ✅ Inserted batch {batch_num}: {inserted_count} records")
-                    return inserted_count
-                else:
-                    logger.warning(f"  ⚠️  Batch {batch_num} attempt {attempt + 1}: No data returned")
-                    
+                # Records are converted as COPY streams them, never all held at once
+                new_count = await self._copy_insert(table_name, map(to_record, records), columns)
+                logger.info(f"  ✅ Copied {len(records)} records into {table_name} ({new_count} new)")
+                return len(records)
             except Exception as e:
-                logger.warning(f"  ⚠️  Batch {batch_num} attempt {attempt + 1} failed: {e}")
-                
-                if attempt == max_retries - 1:
-                    # Last attempt - try individual inserts to recover what we can
-                    logger.info(f"  🔄 Attempting individual inserts for batch {batch_num}...")
-                    individual_success = 0
-                    
-                    for i, record in enumerate(batch):
-                        try:
-                            single_result = self.supabase.table(table_name).insert([record]).execute()
-                            if single_result.data:
-                                individual_success += 1
-                        except Exception as single_e:
-                            logger.warning(f"    ⚠️  Failed to insert record {i}: {single_e}")
-                    
-                    if individual_success > 0:
-                        logger.info(f"  ✅ Recovered {individual_success}/{len(batch)} records from batch {batch_num}")
-                        return individual_success
-                else:
-                    # Wait before retry
-                    import time
-                    time.sleep(1 * (attempt + 1))
+                if self.db_conn.is_in_transaction():
+                    # The surrounding transaction is aborted; the caller rolls it back
+                    raise
+                # COPY is atomic, so nothing was written and PostgREST can retry the lot
+                logger.warning(f"  ⚠️  COPY into {table_name} failed, falling back to PostgREST: {e}")
+        
+        return await self._insert_in_batches(table_name, records)
+    
+    async def _insert_in_batches(self, table_name: str, records: list) -> int:
+        """Insert records in batches of `self.batch_size`, returning the inserted count.
+        
+        Up to `self.concurrency` batches are in flight at once so request
+        round trips overlap instead of adding up.
+        """
+        total_batches = (len(records) + self.batch_size - 1) // self.batch_size
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        logger.info(f"  📦 Inserting {len(records)} {table_name} in {total_batches} batches...")
+        
+        async def insert_batch(client: httpx.AsyncClient, start: int) -> int:
+            async with semaphore:
+                # Slice only once a slot is free, so at most `concurrency` batches exist at once
+                batch = records[start:start + self.batch_size]
+                return await self._safe_batch_insert(client, table_name, batch, start // self.batch_size + 1)
         
-        logger.error(f"  ❌ Failed to insert batch {batch_num} after {max_retries} attempts")
-        return 0
+        client = self._get_rest_client()
+        inserted_counts = await asyncio.gather(*[
+            insert_batch(client, start) for start in range(0, len(records), self.batch_size)
+        ])
+        return sum(inserted_counts)
+    
+    async def _insert(self, client: httpx.AsyncClient, table_name: str, batch: list) -> None:
+        """POST one batch to PostgREST, serialized with orjson.
+        
+        Rows whose ID already exists are skipped, so a batch can be re-sent
+        as a whole after a partial failure or on a rerun of the seed.
+        """
+        response = await client.post(
+            f"/{table_name}",
+            params={'on_conflict': 'id'},
+            content=orjson.dumps(batch, default=_json_default),
+            headers={'Prefer': 'return=minimal,resolution=ignore-duplicates'}
+        )
+        response.raise_for_status()
+    
+    async def _safe_batch_insert(
+        self,
+        client: httpx.AsyncClient,
+        table_name: str,
+        batch: list,
+        batch_num: int
+    ) -> int:
+        """Safely insert a batch with retry mechanism and partial recovery.
+        
+        Network failures are retried with jittered exponential backoff; a
+        batch too large for one request is halved and each half sent on its
+        own, and a batch the server rejects is split to recover its valid records.
+        Returns the number of the batch's records now stored, including ones
+        that already existed. `batch_num` only labels the batch in log messages.
+        """
+        def log_retry(retry_state) -> None:
+            logger.warning(
+                f"  ⚠️  Batch {batch_num} attempt {retry_state.attempt_number} failed: "
+                f"{retry_state.outcome.exception()}"
+            )
+        
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(MAX_INSERT_ATTEMPTS),
+                wait=wait_exponential_jitter(initial=0.1, max=5, jitter=0.1),
+                retry=retry_if_exception_type(httpx.TransportError),
+                before_sleep=log_retry,
+                reraise=True
+            ):
+                with attempt:
+                    await self._insert(client, table_name, batch)
+        except Exception as e:
+            if (isinstance(e, httpx.HTTPStatusError)
+                    and e.response.status_code in PAYLOAD_TOO_LARGE_STATUSES and len(batch) > 1):
+                logger.info(f"  📏 Batch {batch_num} is too large for one request, halving it")
+                mid = len(batch) // 2
+                inserted_count = await self._safe_batch_insert(client, table_name, batch[:mid], batch_num)
+                return inserted_count + await self._safe_batch_insert(client, table_name, batch[mid:], batch_num)
+            
+            logger.warning(f"  ⚠️  Batch {batch_num} failed: {e}")
+            
+            # Split the batch to recover what we can
+            logger.info(f"  🔄 Splitting batch {batch_num} to isolate failing records...")
+            recovered = await self._recover_failed_batch(client, table_name, batch, batch_num)
+            
+            if recovered > 0:
+                logger.info(f"  ✅ Recovered {recovered}/{len(batch)} records from batch {batch_num}")
+            else:
+                logger.error(f"  ❌ Failed to insert batch {batch_num}")
+            return recovered
+        
+        if batch_num % BATCH_LOG_INTERVAL == 0:
+            logger.info(f"  ✅ Inserted batch {batch_num}: {len(batch)} records")
+        return len(batch)
+    
+    async def _recover_failed_batch(
+        self,
+        client: httpx.AsyncClient,
+        table_name: str,
+        batch: list,
+        batch_num: int
+    ) -> int:
+        """Insert the good records of a batch that failed as a whole.
+        
+        The batch is split in halves and each half is inserted on its own,
+        recursing into halves that fail again. Every request stays atomic, and
+        a single bad record costs about 2*log2(n) requests instead of n.
+        """
+        if len(batch) <= 1:
+            return 0
+        
+        mid = len(batch) // 2
+        inserted_count = 0
+        for half in (batch[:mid], batch[mid:]):
+            try:
+                await self._insert(client, table_name, half)
+                inserted_count += len(half)
+            except Exception as e:
+                if len(half) == 1:
+                    logger.warning(f"    ⚠️  Failed to insert record {_record_id(half[0])} from batch {batch_num}: {e}")
+                inserted_count += await self._recover_failed_batch(client, table_name, half, batch_num)
+        
+        return inserted_count
 
-    def populate_transactions(self) -> bool:
-        """Populate transactions table with mock data."""
+    def _format_distinct_dates(self, values: Sequence, field_name: str, user_email: str) -> dict:
+        """Format each distinct date value once, mapping invalid ones to None."""
+        formatted = {}
+        for value in set(values):
+            try:
+                formatted[value] = self._safe_format_date(value, field_name)
+            except ValueError as e:
+                logger.warning(f"  ⚠️  Skipping invalid transaction for {user_email}: {e}")
+                formatted[value] = None
+        return formatted
+    
+    def _build_transaction_rows(self, transactions: list, user_email: str) -> Tuple[List[TransactionRow], int]:
+        """Build insert rows for one user's transactions column by column.
+        
+        Types are normalized once per distinct value, amount signs are found
+        in a single vectorized pass, and each distinct date is formatted once.
+        Amounts are converted to cent-rounded Decimals here, once.
+        Returns `(rows, skipped)`; rows with unformattable dates are skipped.
+        """
+        if not transactions:
+            return [], 0
+        
+        (ids, user_ids, amounts, descriptions, categories,
+         types, dates, created_ats) = zip(*map(_transaction_fields, transactions))
+        
+        type_names = {}
+        for tx_type in set(types):
+            type_match = TYPE_RE.search(str(tx_type).strip())
+            type_names[tx_type] = type_match.group(1).lower() if type_match else str(tx_type)
+        types = [type_names[tx_type] for tx_type in types]
+        
+        # Expenses are stored negative and income positive
+        type_array = np.array(types)
+        amount_array = np.array(amounts, dtype=np.float64)
+        flip_sign = ((type_array == 'expense') & (amount_array > 0)) | ((type_array == 'income') & (amount_array < 0))
+        amounts = [
+            -amount if flip else amount
+            for amount, flip in zip(map(_to_amount, amounts), flip_sign.tolist())
+        ]
+        
+        formatted_dates = self._format_distinct_dates(dates, "transaction_date", user_email)
+        formatted_created = self._format_distinct_dates(created_ats, "created_at", user_email)
+        
+        rows = []
+        skipped = 0
+        for tx_id, user_id, amount, description, category, tx_type, tx_date, created_at in zip(
+            ids, user_ids, amounts, descriptions, categories, types, dates, created_ats
+        ):
+            transaction_date = formatted_dates[tx_date]
+            created_at_iso = formatted_created[created_at]
+            if transaction_date is None or created_at_iso is None:
+                skipped += 1
+                continue
+            rows.append(TransactionRow(
+                tx_id, user_id, amount, description, category, tx_type, transaction_date, created_at_iso
+            ))
+        
+        return rows, skipped
+    
+    def _prepare_transactions(self) -> Tuple[List[TransactionRow], int]:
+        """Build and validate the transaction rows to insert, returning `(rows, skipped)`."""
+        users = self._users
+        transactions_by_user = self.mock_service.get_all_mock_transactions()
+        # Pre-size for every mock row; trimmed to the valid ones below
+        all_transactions = [None] * sum(len(transactions_by_user.get(user.id, ())) for user in users)
+        valid_count = 0
+        skipped_transactions = 0
+        loaded_users = 0
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        
+        for user in users:
+            try:
+                transactions = transactions_by_user.get(user.id, [])
+                if debug_enabled:
+                    logger.debug(f"  Loading {len(transactions)} transactions for {user.email}")
+                
+                user_valid_transactions = 0
+                rows, user_skipped_transactions = self._build_transaction_rows(transactions, user.email)
+                
+                for row in rows:
+                    # Validate transaction data
+                    if self._validate_transaction_data(row, user.email):
+                        all_transactions[valid_count] = row
+                        valid_count += 1
+                        user_valid_transactions += 1
+                    else:
+                        user_skipped_transactions += 1
+                
+                skipped_transactions += user_skipped_transactions
+                loaded_users += 1
+                
+                if debug_enabled:
+                    logger.debug(f"    ✅ {user_valid_transactions} valid, ⚠️  {user_skipped_transactions} skipped")
+                
+            except Exception as e:
+                logger.warning(f"  ⚠️  Failed to load transactions for {user.email}: {e}")
+                continue
+        
+        del all_transactions[valid_count:]
+        logger.info(f"  Loaded {len(all_transactions)} valid transactions for {loaded_users} users")
+        return all_transactions, skipped_transactions
+    
+    def prepare_rows(self) -> Tuple[Tuple[List[dict], int], Tuple[List[TransactionRow], int]]:
+        """Prepare user and transaction rows; pure CPU work, safe to run in a thread."""
+        return self._prepare_users(), self._prepare_transactions()
+    
+    async def populate_transactions(self, prepared: Optional[Tuple[List[TransactionRow], int]] = None) -> bool:
+        """Populate transactions table with mock data.
+        
+        `prepared` is the result of `_prepare_transactions` when the rows were
+        built ahead of time; otherwise they are built here.
+        """
         logger.info("💳 Populating transactions table...")
         
         try:
-            users = self.mock_service.get_mock_users()
-            all_transactions = []
-            skipped_transactions = 0
-            
-            for user in users:
-                try:
-                    transactions = self.mock_service.get_mock_transactions(user.id)
-                    logger.info(f"  Loading {len(transactions)} transactions for {user.email}")
-                    
-                    user_valid_transactions = 0
-                    user_skipped_transactions = 0
-                    
-                    for tx in transactions:
-                        try:
-                            # Safely format transaction date
-                            transaction_date = self._safe_format_date(tx.transaction_date, "transaction_date")
-                            created_at = self._safe_format_date(tx.created_at, "created_at")
-                            
-                            tx_dict = {
-                                'id': tx.id,
-                                'user_id': tx.user_id,
-                                'amount': float(tx.amount),
-                                'description': tx.description,
-                                'category': tx.category,
-                                'type': tx.type,
-                                'date': transaction_date,
-                                'created_at': created_at
-                            }
-                            
-                            # Validate transaction data
-                            if self._validate_transaction_data(tx_dict, user.email):
-                                all_transactions.append(tx_dict)
-                                user_valid_transactions += 1
-                            else:
-                                user_skipped_transactions += 1
-                                skipped_transactions += 1
-                            
-                        except (AttributeError, ValueError, TypeError) as e:
-                            logger.warning(f"  ⚠️  Skipping invalid transaction for {user.email}: {e}")
-                            user_skipped_transactions += 1
-                            skipped_transactions += 1
-                            continue
-                    
-                    logger.info(f"    ✅ {user_valid_transactions} valid, ⚠️  {user_skipped_transactions} skipped")
-                    
-                except Exception as e:
-                    logger.warning(f"  ⚠️  Failed to load transactions for {user.email}: {e}")
-                    continue
+            all_transactions, skipped_transactions = (
+                prepared if prepared is not None else self._prepare_transactions()
+            )
+            
+            zero_amount_count = sum(1 for row in all_transactions if row.amount == 0)
+            if zero_amount_count > 0:
+                logger.info(f"  ℹ️  {zero_amount_count} zero amount transactions")
             
             # Log skipped transactions if any
             if skipped_transactions > 0:
@@ -408,18 +826,9 @@ class DatabaseSetup:
                 return False
             
             # Insert all transactions in batches with improved error handling
-            batch_size = 50  # Reduced batch size for better reliability
-            total_inserted = 0
-            total_batches = (len(all_transactions) + batch_size - 1) // batch_size
-            
-            logger.info(f"  📦 Inserting {len(all_transactions)} transactions in {total_batches} batches...")
-            
-            for i in range(0, len(all_transactions), batch_size):
-                batch = all_transactions[i:i + batch_size]
-                batch_num = i // batch_size + 1
-                
-                inserted_count = self._safe_batch_insert('transactions', batch, batch_num)
-                total_inserted += inserted_count
+            total_inserted = await self._insert_records(
+                'transactions', all_transactions, TRANSACTION_COLUMNS, _transaction_record
+            )
                     
             logger.info(f"✅ Total transactions inserted: {total_inserted}")
             if skipped_transactions > 0:
@@ -438,36 +847,56 @@ class DatabaseSetup:
             logger.error(f"❌ Failed to populate transactions: {e}")
             return False
 
-    def verify_data(self) -> bool:
-        """Verify that data was inserted correctly."""
+    async def verify_data(self) -> bool:
+        """Verify that data was inserted correctly.
+        
+        The counts and the user 1 sample are independent reads, so they are
+        sent concurrently over the shared client.
+        """
         logger.info("🔍 Verifying database data...")
         
         try:
+            client = self._get_rest_client()
+            count_headers = {'Prefer': 'count=exact'}
+            users_result, transactions_result, user1_result, user1_tx_result = await asyncio.gather(
+                client.head("/users", headers=count_headers),
+                client.head("/transactions", headers=count_headers),
+                client.get("/users", params={'select': 'email,full_name', 'id': 'eq.user_1_young_professional'}),
+                # Should have your mock_expense_and_income.json data
+                client.get(
+                    "/transactions",
+                    params={
+                        'select': 'date,amount,description,type',
+                        'user_id': 'eq.user_1_young_professional',
+                        'limit': 3
+                    },
+                    headers=count_headers
+                )
+            )
+            for response in (users_result, transactions_result, user1_result, user1_tx_result):
+                response.raise_for_status()
+            
             # Check users count
-            users_result = self.supabase.table('users').select('count').execute()
-            users_count = len(users_result.data) if users_result.data else 0
+            users_count = _content_range_total(users_result)
             logger.info(f"  Users in database: {users_count}")
             
             # Check transactions count
-            transactions_result = self.supabase.table('transactions').select('count').execute()
-            transactions_count = len(transactions_result.data) if transactions_result.data else 0
+            transactions_count = _content_range_total(transactions_result)
             logger.info(f"  Transactions in database: {transactions_count}")
             
             # Check specific user data
-            user1_result = self.supabase.table('users').select('*').eq('id', 'user_1_young_professional').execute()
-            if user1_result.data:
-                user1 = user1_result.data[0]
+            user1_data = orjson.loads(user1_result.content)
+            if user1_data:
+                user1 = user1_data[0]
                 logger.info(f"  User 1: {user1['email']} - {user1['full_name']}")
                 
-                # Check user 1 transactions (should have your mock_expense_and_income.json data)
-                user1_tx_result = self.supabase.table('transactions').select('*').eq('user_id', 'user_1_young_professional').execute()
-                user1_tx_count = len(user1_tx_result.data) if user1_tx_result.data else 0
+                # Check user 1 transactions
+                user1_tx_count = _content_range_total(user1_tx_result)
                 logger.info(f"  User 1 transactions: {user1_tx_count}")
                 
-                if user1_tx_result.data:
-                    # Show a few sample transactions
-                    for tx in user1_tx_result.data[:3]:
-                        logger.info(f"    • {tx['date']}: ${tx['amount']} - {tx['description']} ({tx['type']})")
+                # Show a few sample transactions
+                for tx in orjson.loads(user1_tx_result.content):
+                    logger.info(f"    • {tx['date']}: ${tx['amount']} - {tx['description']} ({tx['type']})")
             
             success = users_count > 0 and transactions_count > 0
             if success:
@@ -481,25 +910,148 @@ class DatabaseSetup:
             logger.error(f"❌ Failed to verify data: {e}")
             return False
 
-    async def setup_complete_database(self) -> bool:
-        """Complete database setup process."""
+    async def _bulk_load_in_transaction(
+        self,
+        users_prepared: Tuple[List[dict], int],
+        transactions_prepared: Tuple[List[TransactionRow], int]
+    ) -> bool:
+        """Load users and transactions over the direct connection in one transaction.
+        
+        Both COPYs share a single commit, and the deferred user foreign key is
+        checked once at commit time instead of row by row. Secondary indexes on
+        transactions are dropped for the load and rebuilt once afterwards, and
+        the daily summary trigger is disabled and the loaded users' summary
+        rows rebuilt with one grouped insert.
+        Returns False after rolling back if either step fails.
+        """
+        # Parallel shard runs would serialize on the locks DROP INDEX and ALTER TABLE take
+        exclusive = self.num_shards == 1
+        try:
+            async with self.db_conn.transaction():
+                await self.db_conn.execute("SET CONSTRAINTS ALL DEFERRED")
+                index_definitions = []
+                if exclusive:
+                    index_definitions = await self._drop_secondary_indexes('transactions')
+                    await self.db_conn.execute(
+                        f"ALTER TABLE public.transactions DISABLE TRIGGER {SUMMARY_TRIGGER}"
+                    )
+                if not await self.populate_users(users_prepared):
+                    raise RuntimeError("failed to populate users")
+                if not await self.populate_transactions(transactions_prepared):
+                    raise RuntimeError("failed to populate transactions")
+                for index_definition in index_definitions:
+                    await self.db_conn.execute(index_definition)
+                if exclusive:
+                    user_ids = {user['id'] for user in users_prepared[0]}
+                    user_ids.update(row.user_id for row in transactions_prepared[0])
+                    await self._rebuild_daily_summary(sorted(user_ids))
+                    await self.db_conn.execute(
+                        f"ALTER TABLE public.transactions ENABLE TRIGGER {SUMMARY_TRIGGER}"
+                    )
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️  Bulk load rolled back, retrying through PostgREST: {e}")
+            return False
+    
+    async def _rebuild_daily_summary(self, user_ids: List[str]) -> None:
+        """Recompute the user_daily_summary rows of the given users from transactions."""
+        await self.db_conn.execute(
+            "DELETE FROM public.user_daily_summary WHERE user_id = ANY($1::text[])", user_ids
+        )
+        status = await self.db_conn.execute(
+            "INSERT INTO public.user_daily_summary "
+            "(user_id, date, category, type, total_amount, total_abs_amount, transaction_count) "
+            "SELECT user_id, date, category, type, SUM(amount), SUM(ABS(amount)), COUNT(*) "
+            "FROM public.transactions WHERE user_id = ANY($1::text[]) "
+            "GROUP BY user_id, date, category, type",
+            user_ids
+        )
+        logger.info(f"  📊 Rebuilt {status.split()[-1]} daily summary rows")
+    
+    async def _drop_secondary_indexes(self, table_name: str) -> List[str]:
+        """Drop a table's non-unique indexes, returning the SQL to recreate them.
+        
+        Building an index once over loaded data is cheaper than updating it for
+        every inserted row. Primary key and unique indexes are kept, since the
+        upsert relies on them.
+        """
+        indexes = await self.db_conn.fetch(
+            "SELECT indexrelid::regclass::text AS name, pg_get_indexdef(indexrelid) AS definition "
+            "FROM pg_index WHERE indrelid = $1::regclass AND NOT indisprimary AND NOT indisunique",
+            f"public.{table_name}"
+        )
+        for index in indexes:
+            await self.db_conn.execute(f"DROP INDEX {index['name']}")
+        if indexes:
+            logger.info(f"  🗂️  Dropped {len(indexes)} {table_name} indexes for the bulk load")
+        return [index['definition'] for index in indexes]
+    
+    async def setup_complete_database(self, apply_schema: bool = False) -> bool:
+        """Complete database setup process.
+        
+        With `apply_schema`, schema.sql is applied over the direct connection
+        first, which drops and recreates the tables.
+        """
         logger.info("🚀 Starting complete database setup...")
         
-        # Step 1: Create schema (skip for now due to RPC limitations)
-        logger.info("⚠️  Schema creation skipped - please run schema.sql manually in Supabase SQL Editor")
+        if not self._users:
+            logger.warning("⚠️  No mock users fall in this shard - nothing to seed")
+            return True
+        
+        # Row preparation is pure CPU work, so it runs while the connection and schema are set up
+        prepare_task = asyncio.create_task(asyncio.to_thread(self.prepare_rows))
         
-        # Step 2: Populate users
-        if not self.populate_users():
-            logger.error("❌ Failed to populate users - stopping setup")
-            return False
+        try:
+            # Schema changes need the direct connection; a plain load can use the pooler
+            self.db_conn = await self._connect_db(direct=apply_schema)
             
-        # Step 3: Populate transactions
-        if not self.populate_transactions():
-            logger.error("❌ Failed to populate transactions - stopping setup")
-            return False
+            # Step 1: Create schema
+            if not apply_schema:
+                logger.info("⚠️  Schema creation skipped - run schema.sql in Supabase or pass --apply-schema")
+            elif self.db_conn is None:
+                logger.error("❌ Applying the schema needs SUPABASE_DB_URL - stopping setup")
+                return False
+            elif not await self._apply_schema_file(self.db_conn):
+                return False
+            
+            users_prepared, transactions_prepared = await prepare_task
+            
+            if self.db_conn is not None and len(transactions_prepared[0]) <= COPY_THRESHOLD:
+                logger.info(f"ℹ️  {COPY_THRESHOLD} transactions or fewer - inserting through PostgREST")
+                await self.db_conn.close()
+                self.db_conn = None
+            
+            if self.db_conn is not None and not await self._bulk_load_in_transaction(
+                users_prepared, transactions_prepared
+            ):
+                # Nothing was committed, so PostgREST can redo both steps from scratch
+                await self.db_conn.close()
+                self.db_conn = None
+            
+            if self.db_conn is None:
+                # Step 2: Populate users
+                if not await self.populate_users(users_prepared):
+                    logger.error("❌ Failed to populate users - stopping setup")
+                    return False
+                    
+                # Step 3: Populate transactions
+                if not await self.populate_transactions(transactions_prepared):
+                    logger.error("❌ Failed to populate transactions - stopping setup")
+                    return False
+        finally:
+            # Early exits leave row preparation running; don't orphan it
+            if not prepare_task.done():
+                prepare_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await prepare_task
+            if self.db_conn is not None:
+                await self.db_conn.close()
+                self.db_conn = None
+            # Rows were replaced without SupabaseClient's writes, so drop cached analytics
+            clear_all_caches()
             
         # Step 4: Verify data
-        if not self.verify_data():
+        if not await self.verify_data():
             logger.error("❌ Data verification failed - setup incomplete")
             return False
             
@@ -509,9 +1061,29 @@ class DatabaseSetup:
         return True
 
 
-async def main():
+def _parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse command line options for unattended and sharded runs."""
+    parser = argparse.ArgumentParser(description="Populate the Stori database with mock data.")
+    parser.add_argument(
+        '--yes', '-y',
+        action='store_true',
+        default=os.getenv("STORI_ASSUME_YES", "").lower() in ("1", "true", "yes"),
+        help="Skip the schema.sql confirmation prompt (or set STORI_ASSUME_YES=1)"
+    )
+    parser.add_argument(
+        '--apply-schema',
+        action='store_true',
+        help="Drop and recreate the tables from schema.sql over SUPABASE_DB_URL before seeding"
+    )
+    parser.add_argument('--shard', type=int, default=0, help="Zero-based shard of users to seed")
+    parser.add_argument('--num-shards', type=int, default=1, help="Total number of parallel shard runs")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[Sequence[str]] = None):
     """Main setup function."""
-    setup = DatabaseSetup()
+    args = _parse_args(argv)
+    setup = DatabaseSetup(shard=args.shard, num_shards=args.num_shards)
     
     print("🗄️ Stori Database Setup")
     print("=" * 50)
@@ -522,12 +1094,17 @@ async def main():
     print("   3. Then run this script to populate data")
     print()
     
-    response = input("Have you run the schema.sql file in Supabase? (y/N): ").strip().lower()
-    if response != 'y':
-        print("❌ Please run schema.sql in Supabase first, then re-run this script")
-        return False
+    if not (args.yes or args.apply_schema):
+        # Read the answer off the event loop thread
+        response = await asyncio.to_thread(input, "Have you run the schema.sql file in Supabase? (y/N): ")
+        if response.strip().lower() != 'y':
+            print("❌ Please run schema.sql in Supabase first, then re-run this script")
+            return False
         
-    success = await setup.setup_complete_database()
+    try:
+        success = await setup.setup_complete_database(apply_schema=args.apply_schema)
+    finally:
+        await setup.close()
     
     if success:
         print()
@@ -1,13 +1,18 @@
 """Clean AI controller with only essential LLM-powered endpoints."""
 
+import asyncio
 import logging
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 
 from services.supabase_service import SupabaseClient, get_supabase_client
 from services.auth_middleware import get_current_user
 from providers.llms import LLMProviderFactory
+from config import get_settings
 from .repository import AIRepository
 from .service import AIService
 from .schemas import (
@@ -21,26 +26,76 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
+# Limits for /ai/advice/batch: requests per call and advice generated at once
+MAX_ADVICE_BATCH_SIZE = 100
+ADVICE_BATCH_CONCURRENCY = 16
+
+HEALTHY_RESPONSE = {
+    "status": "healthy",
+    "llm_available": True,
+    "provider": "openrouter",
+    "service": "ai_chat"
+}
+
+# Settings read by LLMProviderFactory; changing any of them rebuilds the provider
+LLM_SETTINGS_FIELDS = (
+    "llm_provider",
+    "llm_temperature",
+    "openai_api_key",
+    "ollama_llm_model",
+    "ollama_base_url",
+    "azure_api_key",
+    "azure_endpoint",
+    "azure_api_version",
+    "azure_llm_deployment",
+    "bedrock_model_id",
+    "aws_region",
+    "aws_profile",
+    "aws_access_key_id",
+    "aws_secret_access_key",
+    "lm_studio_model",
+    "lm_studio_base_url",
+    "lm_studio_api_key",
+    "openrouter_api_key",
+    "openrouter_model",
+)
+
 
-def get_llm_provider():
-    """Dependency to get LLM provider."""
+@lru_cache(maxsize=1)
+def _create_llm_provider(config_key: tuple):
+    """Build the LLM provider once per distinct configuration."""
     return LLMProviderFactory.create_llm()
 
 
-def get_ai_service(
+async def get_llm_provider():
+    """Dependency to get the shared LLM provider for the current configuration."""
+    settings = get_settings()
+    return _create_llm_provider(tuple(getattr(settings, field, None) for field in LLM_SETTINGS_FIELDS))
+
+
+# Last built service, keyed on the ids of its client and provider. The service
+# holds references to both, so those ids can't be reused while it is cached.
+_ai_service: Optional[Tuple[Tuple[int, int], AIService]] = None
+
+
+async def get_ai_service(
     supabase_client: SupabaseClient = Depends(get_supabase_client),
     llm_provider=Depends(get_llm_provider)
 ) -> AIService:
-    """Dependency to get AI service."""
-    repository = AIRepository(supabase_client)
-    return AIService(repository, llm_provider)
+    """Dependency to get AI service, rebuilt only when its client or provider changes."""
+    global _ai_service
+    key = (id(supabase_client), id(llm_provider))
+    cached = _ai_service
+    if cached is None or cached[0] != key:
+        cached = (key, AIService(AIRepository(supabase_client), llm_provider))
+        _ai_service = cached
+    return cached[1]
 
 
 @router.get("/debug")
 async def debug_config():
     """Debug endpoint to check AI configuration (without exposing secrets)."""
     try:
-        from config.settings import get_settings
         settings = get_settings()
         
         return {
@@ -64,15 +119,9 @@ async def debug_config():
 async def ai_health():
     """AI service health check."""
     try:
-        # Try to create LLM provider
-        llm_provider = LLMProviderFactory.create_llm()
-        
-        return {
-            "status": "healthy",
-            "llm_available": True,
-            "provider": "openrouter",
-            "service": "ai_chat"
-        }
+        # The provider is cached per configuration, so this only builds it when settings change
+        await get_llm_provider()
+        return HEALTHY_RESPONSE
     except Exception as e:
         logger.error(f"AI health check failed: {e}")
         return {
@@ -98,6 +147,20 @@ async def chat_with_ai(
         raise HTTPException(status_code=500, detail="Failed to process chat request")
 
 
+@router.post("/chat/stream")
+async def stream_chat_with_ai(
+    request: ChatRequest,
+    current_user: dict = Depends(get_current_user),
+    service: AIService = Depends(get_ai_service)
+):
+    """Chat with AI, streaming the reply as server-sent events."""
+    async def event_stream():
+        async for event in service.stream_chat_with_ai(current_user["user_id"], request):
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/advice", response_model=AIAdviceResponse)
 async def get_financial_advice(
     request: AdviceRequest,
@@ -110,4 +173,32 @@ async def get_financial_advice(
         
     except Exception as e:
         logger.error(f"Error getting financial advice: {e}")
-        raise HTTPException(status_code=500, detail="Failed to generate financial advice")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to generate financial advice")
+
+
+@router.post("/advice/batch", response_model=List[AIAdviceResponse])
+async def get_financial_advice_batch(
+    requests: List[AdviceRequest],
+    current_user: dict = Depends(get_current_user),
+    service: AIService = Depends(get_ai_service)
+):
+    """Get financial advice for several requests at once, in request order."""
+    if len(requests) > MAX_ADVICE_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_ADVICE_BATCH_SIZE} advice requests per batch"
+        )
+    
+    user_id = current_user["user_id"]
+    semaphore = asyncio.Semaphore(ADVICE_BATCH_CONCURRENCY)
+    
+    async def advise(request: AdviceRequest) -> AIAdviceResponse:
+        async with semaphore:
+            return await service.get_financial_advice(user_id, request)
+    
+    try:
+        return await asyncio.gather(*(advise(request) for request in requests))
+        
+    except Exception as e:
+        logger.error(f"Error getting batch financial advice: {e}")
+        raise HTTPException(status_code=500, detail="Failed to generate financial advice")
@@ -1,9 +1,16 @@
 """AI repository for data access operations."""
 
+import heapq
 import logging
+import time
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional
 
+import numpy as np
+from postgrest.exceptions import APIError
+
+from services.cache_service import async_ttl_cache
 from services.supabase_service import SupabaseClient
 
 from core.models import TransactionType
@@ -11,37 +18,128 @@ from .schemas import FinancialContext
 
 logger = logging.getLogger(__name__)
 
+# Indexed by weekday with Monday as 0, matching date.weekday() and strftime('%A')
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Plain string values compared in the aggregation loops, resolved once
+INCOME_TYPE = TransactionType.INCOME.value
+EXPENSE_TYPE = TransactionType.EXPENSE.value
+
+# Columns each query reads, so rows don't carry fields the aggregation never touches
+# The user/type/date filters below are served by idx_transactions_user_type_date (schema.sql)
+CONTEXT_COLUMNS = 'amount,category,type,date'
+PATTERN_COLUMNS = 'amount,category,date,description'
+ANOMALY_COLUMNS = 'id,amount,category,date,description'
+
+# How long to aggregate in Python after ai_financial_context is reported
+# missing before trying it again (e.g. once PostgREST reloads its schema cache)
+CONTEXT_RPC_RETRY_SECONDS = 300.0
+
+# Expense size buckets: small below 20, medium below 100, large otherwise
+AMOUNT_BUCKET_EDGES = np.array([20.0, 100.0])
+
 
 class AIRepository:
     """Repository for AI-related data operations."""
     
     def __init__(self, supabase_client: SupabaseClient):
         self.supabase = supabase_client
+        # time.monotonic() before which ai_financial_context is assumed missing
+        self._context_rpc_retry_at = 0.0
     
+    @async_ttl_cache()
     async def get_financial_context(
         self, 
         user_id: str,
-        days_back: int = 30
+        days_back: int = 30,
+        include_trends: bool = True
+    ) -> FinancialContext:
+        """Get comprehensive financial context for AI analysis.
+        
+        Aggregates in Postgres through the ai_financial_context function, or
+        over the fetched rows if the database doesn't have it yet. Callers
+        that don't read weekly trends can pass include_trends=False to skip
+        computing them.
+        """
+        if time.monotonic() >= self._context_rpc_retry_at:
+            try:
+                result = self.supabase.client.rpc(
+                    'ai_financial_context',
+                    {'p_user_id': user_id, 'days_back': days_back}
+                ).execute()
+                return self._context_from_summary(result.data, include_trends)
+            except APIError as e:
+                if e.code != 'PGRST202':
+                    logger.error(f"Error getting financial context: {e}")
+                    raise
+                logger.warning(
+                    "ai_financial_context function not found - aggregating transactions "
+                    f"in Python for the next {CONTEXT_RPC_RETRY_SECONDS:.0f}s"
+                )
+                self._context_rpc_retry_at = time.monotonic() + CONTEXT_RPC_RETRY_SECONDS
+        
+        return await self._aggregate_financial_context(user_id, days_back, include_trends)
+    
+    def _context_from_summary(self, summary: Dict, include_trends: bool) -> FinancialContext:
+        """Build a FinancialContext from an ai_financial_context result."""
+        total_income = summary['total_income']
+        total_expenses = summary['total_expenses']
+        
+        top_categories = [
+            {
+                'category': cat['category'],
+                'total_amount': cat['total_amount'],
+                'transaction_count': cat['transaction_count'],
+                'avg_amount': cat['total_amount'] / cat['transaction_count']
+            }
+            for cat in summary['top_categories']
+        ]
+        
+        recent_trends = []
+        if include_trends:
+            recent_trends = self._calculate_weekly_trends({
+                date.fromisoformat(week['week_start']): week['total_amount']
+                for week in summary['weekly_totals']
+            })
+        
+        return FinancialContext(
+            total_income=total_income,
+            total_expenses=total_expenses,
+            net_amount=total_income - total_expenses,
+            top_categories=top_categories,
+            recent_trends=recent_trends,
+            transaction_count=summary['transaction_count'],
+            date_range={
+                'start_date': summary['start_date'],
+                'end_date': summary['end_date']
+            }
+        )
+    
+    async def _aggregate_financial_context(
+        self,
+        user_id: str,
+        days_back: int,
+        include_trends: bool
     ) -> FinancialContext:
-        """Get comprehensive financial context for AI analysis."""
+        """Build the financial context by fetching the period's rows and aggregating them here."""
         try:
-            # First, get the user's actual transaction date range
-            date_range_query = (self.supabase.client.table('transactions')
-                              .select('date')
-                              .eq('user_id', user_id)
-                              .order('date', desc=False))
+            # First, get the date of the user's latest transaction
+            latest_query = (self.supabase.client.table('transactions')
+                            .select('date')
+                            .eq('user_id', user_id)
+                            .order('date', desc=True)
+                            .limit(1))
             
-            date_range_result = date_range_query.execute()
+            latest_result = latest_query.execute()
             
-            if not date_range_result.data:
+            if not latest_result.data:
                 # No transactions found, use default date range
                 end_date = date.today()
                 start_date = end_date - timedelta(days=days_back)
             else:
                 # Get the most recent transactions within a reasonable range
                 # Use the last transaction date as end_date, and look back from there
-                all_dates = [datetime.fromisoformat(row['date']).date() for row in date_range_result.data]
-                latest_date = max(all_dates)
+                latest_date = datetime.fromisoformat(latest_result.data[0]['date']).date()
                 
                 # Use either the specified days_back or get recent significant period
                 start_date = latest_date - timedelta(days=days_back)
@@ -49,7 +147,7 @@ class AIRepository:
             
             # Get all transactions in the period
             query = (self.supabase.client.table('transactions')
-                    .select('*')
+                    .select(CONTEXT_COLUMNS)
                     .eq('user_id', user_id)
                     .gte('date', start_date.isoformat())
                     .lte('date', end_date.isoformat())
@@ -58,31 +156,42 @@ class AIRepository:
             result = query.execute()
             transactions = result.data
             
-            # Calculate basic metrics
+            # Calculate basic metrics and weekly expense totals in one pass
             total_income = 0
             total_expenses = 0
-            category_totals = {}
-            category_counts = {}
+            category_totals = defaultdict(float)
+            category_counts = defaultdict(int)
+            weekly_totals = defaultdict(float)
+            week_of_date = {}
             
             for txn in transactions:
-                amount = abs(float(txn['amount']))  # Ensure positive amount for calculations
-                category = txn['category']
+                raw_amount = float(txn['amount'])
+                amount = abs(raw_amount)  # Ensure positive amount for calculations
                 txn_type = txn['type']
                 
-                if txn_type == TransactionType.INCOME.value:
+                if txn_type == INCOME_TYPE:
                     total_income += amount
-                elif txn_type == TransactionType.EXPENSE.value:
+                elif txn_type == EXPENSE_TYPE:
                     total_expenses += amount
                     
-                    if category not in category_totals:
-                        category_totals[category] = 0
-                        category_counts[category] = 0
+                    category = txn['category']
                     category_totals[category] += amount
                     category_counts[category] += 1
+                    
+                    if include_trends:
+                        # Many rows share a date, so each distinct date is parsed once
+                        txn_date = txn['date']
+                        week_start = week_of_date.get(txn_date)
+                        if week_start is None:
+                            day = datetime.fromisoformat(txn_date).date()
+                            # Get Monday of the week
+                            week_start = day - timedelta(days=day.weekday())
+                            week_of_date[txn_date] = week_start
+                        weekly_totals[week_start] += raw_amount
             
             # Get top expense categories
             top_categories = []
-            for category, total in sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:5]:
+            for category, total in heapq.nlargest(5, category_totals.items(), key=lambda x: x[1]):
                 top_categories.append({
                     'category': category,
                     'total_amount': total,
@@ -90,8 +199,7 @@ class AIRepository:
                     'avg_amount': total / category_counts[category] if category_counts[category] > 0 else 0
                 })
             
-            # Calculate weekly trends
-            recent_trends = await self._calculate_weekly_trends(user_id, start_date, end_date)
+            recent_trends = self._calculate_weekly_trends(weekly_totals) if include_trends else []
             
             return FinancialContext(
                 total_income=total_income,
@@ -121,9 +229,9 @@ class AIRepository:
             start_date = end_date - timedelta(days=days_back)
             
             query = (self.supabase.client.table('transactions')
-                    .select('*')
+                    .select(PATTERN_COLUMNS)
                     .eq('user_id', user_id)
-                    .eq('type', TransactionType.EXPENSE.value)
+                    .eq('type', EXPENSE_TYPE)
                     .gte('date', start_date.isoformat())
                     .lte('date', end_date.isoformat())
                     .order('date'))
@@ -140,49 +248,57 @@ class AIRepository:
                 'largest_expenses': []
             }
             
+            amounts = np.fromiter(
+                (float(txn['amount']) for txn in transactions),
+                dtype=np.float64,
+                count=len(transactions)
+            )
+            
+            # Daily patterns: parse every date in one NumPy call instead of a datetime per row.
+            # Day 0 of datetime64 (1970-01-01) was a Thursday, hence the offset of 3
+            days = np.array([txn['date'][:10] for txn in transactions], dtype='datetime64[D]')
+            weekdays = (days.astype(np.int64) + 3) % 7
+            day_totals = np.bincount(weekdays, weights=amounts, minlength=7).tolist()
+            day_counts = np.bincount(weekdays, minlength=7).tolist()
+            # List days in order of first appearance, as the per-row version did
+            _, first_rows = np.unique(weekdays, return_index=True)
+            for weekday in weekdays[np.sort(first_rows)].tolist():
+                patterns['daily_averages'][WEEKDAY_NAMES[weekday]] = {
+                    'total': day_totals[weekday],
+                    'count': day_counts[weekday]
+                }
+            
+            amount_list = amounts.tolist()
             total_amount = 0
-            for txn in transactions:
-                amount = float(txn['amount'])
+            for txn, amount in zip(transactions, amount_list):
                 total_amount += amount
                 
-                # Daily patterns
-                txn_date = datetime.fromisoformat(txn['date'])
-                day_name = txn_date.strftime('%A')
-                if day_name not in patterns['daily_averages']:
-                    patterns['daily_averages'][day_name] = {'total': 0, 'count': 0}
-                patterns['daily_averages'][day_name]['total'] += amount
-                patterns['daily_averages'][day_name]['count'] += 1
-                
                 # Category frequency
                 category = txn['category']
                 if category not in patterns['category_frequency']:
                     patterns['category_frequency'][category] = 0
                 patterns['category_frequency'][category] += 1
-                
-                # Amount distribution
-                if amount < 20:
-                    patterns['amount_distribution']['small'] += 1
-                elif amount < 100:
-                    patterns['amount_distribution']['medium'] += 1
-                else:
-                    patterns['amount_distribution']['large'] += 1
-                
-                # Track largest expenses
-                patterns['largest_expenses'].append({
-                    'amount': amount,
-                    'category': category,
-                    'date': txn['date'],
-                    'description': txn.get('description', '')
-                })
             
             # Calculate daily averages
             for day in patterns['daily_averages']:
                 data = patterns['daily_averages'][day]
                 data['average'] = data['total'] / data['count'] if data['count'] > 0 else 0
             
-            # Sort largest expenses
-            patterns['largest_expenses'].sort(key=lambda x: x['amount'], reverse=True)
-            patterns['largest_expenses'] = patterns['largest_expenses'][:10]
+            # Amount distribution: bucket every amount at once
+            small, medium, large = np.bincount(
+                np.digitize(amounts, AMOUNT_BUCKET_EDGES), minlength=3
+            ).tolist()
+            patterns['amount_distribution'] = {'small': small, 'medium': medium, 'large': large}
+            
+            # Largest expenses: select the top 10 rows, then build only their entries
+            for i in heapq.nlargest(10, range(len(amount_list)), key=amount_list.__getitem__):
+                txn = transactions[i]
+                patterns['largest_expenses'].append({
+                    'amount': amount_list[i],
+                    'category': txn['category'],
+                    'date': txn['date'],
+                    'description': txn.get('description', '')
+                })
             
             patterns['total_analyzed'] = total_amount
             patterns['transaction_count'] = len(transactions)
@@ -205,12 +321,11 @@ class AIRepository:
             start_date = end_date - timedelta(days=days_back)
             
             query = (self.supabase.client.table('transactions')
-                    .select('*')
+                    .select(ANOMALY_COLUMNS)
                     .eq('user_id', user_id)
-                    .eq('type', TransactionType.EXPENSE.value)
+                    .eq('type', EXPENSE_TYPE)
                     .gte('date', start_date.isoformat())
-                    .lte('date', end_date.isoformat())
-                    .order('amount', desc=True))
+                    .lte('date', end_date.isoformat()))
             
             result = query.execute()
             transactions = result.data
@@ -219,64 +334,42 @@ class AIRepository:
                 return []
             
             # Calculate basic statistics
-            amounts = [float(txn['amount']) for txn in transactions]
-            avg_amount = sum(amounts) / len(amounts)
+            amounts = np.fromiter(
+                (float(txn['amount']) for txn in transactions),
+                dtype=np.float64,
+                count=len(transactions)
+            )
+            avg_amount = float(amounts.mean())
             
             # Simple anomaly detection: transactions > 2 standard deviations from mean
-            variance = sum((x - avg_amount) ** 2 for x in amounts) / len(amounts)
-            std_dev = variance ** 0.5
-            anomaly_threshold = avg_amount + (2 * std_dev)
+            anomaly_threshold = avg_amount + (2 * float(amounts.std()))
             
+            # Top 10 flagged rows by amount, selected here rather than sorted by the database
+            amount_list = amounts.tolist()
+            flagged = np.flatnonzero(amounts > anomaly_threshold).tolist()
             anomalies = []
-            for txn in transactions:
-                amount = float(txn['amount'])
-                if amount > anomaly_threshold:
-                    anomalies.append({
-                        'transaction_id': txn['id'],
-                        'amount': amount,
-                        'category': txn['category'],
-                        'date': txn['date'],
-                        'description': txn.get('description', ''),
-                        'deviation_factor': amount / avg_amount,
-                        'anomaly_type': 'high_amount'
-                    })
-            
-            return anomalies[:10]  # Return top 10 anomalies
+            for i in heapq.nlargest(10, flagged, key=amount_list.__getitem__):
+                txn = transactions[i]
+                amount = amount_list[i]
+                anomalies.append({
+                    'transaction_id': txn['id'],
+                    'amount': amount,
+                    'category': txn['category'],
+                    'date': txn['date'],
+                    'description': txn.get('description', ''),
+                    'deviation_factor': amount / avg_amount,
+                    'anomaly_type': 'high_amount'
+                })
+            
+            return anomalies
             
         except Exception as e:
             logger.error(f"Error detecting anomalies: {e}")
             raise
     
-    async def _calculate_weekly_trends(
-        self, 
-        user_id: str,
-        start_date: date,
-        end_date: date
-    ) -> List[Dict]:
-        """Calculate weekly spending trends."""
+    def _calculate_weekly_trends(self, weekly_totals: Dict[date, float]) -> List[Dict]:
+        """Calculate weekly spending trends from expense totals keyed by week start."""
         try:
-            # Group transactions by week
-            query = (self.supabase.client.table('transactions')
-                    .select('*')
-                    .eq('user_id', user_id)
-                    .eq('type', TransactionType.EXPENSE.value)
-                    .gte('date', start_date.isoformat())
-                    .lte('date', end_date.isoformat())
-                    .order('date'))
-            
-            result = query.execute()
-            transactions = result.data
-            
-            weekly_totals = {}
-            for txn in transactions:
-                txn_date = datetime.fromisoformat(txn['date']).date()
-                # Get Monday of the week
-                week_start = txn_date - timedelta(days=txn_date.weekday())
-                
-                if week_start not in weekly_totals:
-                    weekly_totals[week_start] = 0
-                weekly_totals[week_start] += float(txn['amount'])
-            
             # Convert to list and calculate trends
             trends = []
             weeks = sorted(weekly_totals.keys())
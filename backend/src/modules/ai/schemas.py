@@ -1,7 +1,6 @@
 """AI-related Pydantic schemas for request/response validation."""
 
 from datetime import datetime
-from decimal import Decimal
 from enum import Enum
 from typing import Dict, List, Optional, Union
 
@@ -53,7 +52,7 @@ class AdviceInsight(BaseModel):
     description: str
     priority: AdvicePriority
     category: Optional[str] = None
-    amount_impact: Optional[Decimal] = None
+    amount_impact: Optional[float] = None
     confidence_score: float
     actionable_steps: List[str]
 
@@ -66,7 +65,7 @@ class AIAdviceResponse(BaseModel):
     generated_at: datetime
     insights: List[AdviceInsight]
     summary: str
-    data_analysis: Dict[str, Union[str, float, Decimal]]
+    data_analysis: Dict[str, Union[str, float]]
     recommendations: List[str]
     confidence_score: float
 
@@ -113,11 +112,11 @@ class FinancialContext(BaseModel):
     """Financial context for AI analysis."""
     model_config = ConfigDict(from_attributes=True)
     
-    total_income: Decimal
-    total_expenses: Decimal
-    net_amount: Decimal
-    top_categories: List[Dict[str, Union[str, Decimal, int]]]
-    recent_trends: List[Dict[str, Union[str, Decimal]]]
+    total_income: float
+    total_expenses: float
+    net_amount: float
+    top_categories: List[Dict[str, Union[str, float, int]]]
+    recent_trends: List[Dict[str, Union[str, float]]]
     transaction_count: int
     date_range: Dict[str, str]
 
@@ -153,7 +152,7 @@ class AnalysisResult(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
     analysis_type: str
-    results: Dict[str, Union[str, float, Decimal, List]]
+    results: Dict[str, Union[str, float, List]]
     insights: List[str]
     visualizations: Optional[List[Dict[str, Union[str, List]]]] = None
     confidence_score: float
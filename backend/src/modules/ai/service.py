@@ -1,9 +1,9 @@
 """AI service layer for business logic."""
 
 import logging
+import re
 from datetime import datetime
-from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
@@ -23,6 +23,28 @@ from .schemas import (
 
 logger = logging.getLogger(__name__)
 
+CHAT_ERROR_MESSAGE = "I'm sorry, I'm having trouble processing your request right now. Please try again later."
+
+# Set on the final /chat/stream event when the LLM stream broke after text was sent
+STREAM_INTERRUPTED_ERROR = "stream_interrupted"
+
+# Keywords that route a fallback chat reply to the spending summary (substring match)
+SPENDING_KEYWORDS_RE = re.compile(r"spend|expense|cost|category", re.IGNORECASE)
+
+# Canned fallback chat text and suggestions
+GENERAL_CHAT_MESSAGE = "I can help you analyze your spending patterns and financial health. What would you like to know?"
+NO_DATA_CHAT_MESSAGE = "I'd love to help with your financial questions! Connect your financial data so I can provide personalized insights about your spending and savings."
+NO_DATA_ACTIONS = ("Connect financial data", "Ask general financial advice")
+SPENDING_ACTIONS = ("Review top categories", "Find cost-cutting opportunities", "Set category budgets")
+DEFAULT_ACTIONS = ("Track expenses", "Set financial goals", "Review spending patterns")
+
+# Suggested actions by savings rate (percent): the first bracket whose bound exceeds the rate
+SAVINGS_RATE_ACTIONS = (
+    (10, ("Review budget", "Find cost-cutting opportunities")),
+    (20, ("Optimize expenses", "Increase savings rate")),
+    (float('inf'), ("Investment planning", "Long-term financial goals")),
+)
+
 
 class AIService:
     """Service layer for AI operations."""
@@ -110,14 +132,16 @@ Answer in 2-4 sentences with specific data points:"""
     ) -> List[AdviceInsight]:
         """Generate data-driven insights from real financial data."""
         insights = []
+        total_income = context.total_income
+        total_expenses = context.total_expenses
         
         # Basic financial health insights
-        if float(context.total_expenses) > float(context.total_income):
+        if total_expenses > total_income:
             insights.append(AdviceInsight(
                 title="Spending Exceeds Income",
                 description=f"Your expenses (${context.total_expenses:.2f}) exceed your income (${context.total_income:.2f}).",
                 priority=AdvicePriority.HIGH,
-                amount_impact=Decimal(str(float(context.total_expenses) - float(context.total_income))),
+                amount_impact=total_expenses - total_income,
                 confidence_score=0.95,
                 actionable_steps=[
                     "Review and reduce non-essential expenses",
@@ -128,13 +152,13 @@ Answer in 2-4 sentences with specific data points:"""
         # Category-specific insights
         if context.top_categories:
             top_category = context.top_categories[0]
-            if float(top_category['total_amount']) > float(context.total_expenses) * 0.4:
+            if top_category['total_amount'] > total_expenses * 0.4:
                 insights.append(AdviceInsight(
                     title=f"High Spending in {top_category['category']}",
                     description=f"You're spending ${top_category['total_amount']:.2f} on {top_category['category']}.",
                     priority=AdvicePriority.MEDIUM,
                     category=top_category['category'],
-                    amount_impact=Decimal(str(top_category['total_amount'])),
+                    amount_impact=top_category['total_amount'],
                     confidence_score=0.90,
                     actionable_steps=[
                         f"Set a budget limit for {top_category['category']}",
@@ -151,12 +175,12 @@ Answer in 2-4 sentences with specific data points:"""
         insights: List[AdviceInsight]
     ) -> Dict:
         """Generate advice based on real data analysis."""
-        summary = f"Based on your {request.time_period_days}-day financial data, "
-        
         if context.net_amount > 0:
-            summary += f"you have a positive cash flow of ${context.net_amount:.2f}. "
+            summary = (f"Based on your {request.time_period_days}-day financial data, "
+                       f"you have a positive cash flow of ${context.net_amount:.2f}. ")
         else:
-            summary += f"you have a negative cash flow of ${abs(context.net_amount):.2f}. "
+            summary = (f"Based on your {request.time_period_days}-day financial data, "
+                       f"you have a negative cash flow of ${abs(context.net_amount):.2f}. ")
         
         recommendations = []
         if insights:
@@ -164,10 +188,10 @@ Answer in 2-4 sentences with specific data points:"""
                 recommendations.extend(insight.actionable_steps[:2])
         
         data_analysis = {
-            'income_expense_ratio': float(context.total_income / context.total_expenses) if context.total_expenses > 0 else 0,
+            'income_expense_ratio': context.total_income / context.total_expenses if context.total_expenses > 0 else 0,
             'top_expense_category': context.top_categories[0]['category'] if context.top_categories else 'N/A',
             'transaction_frequency': context.transaction_count / request.time_period_days,
-            'avg_transaction_amount': float(context.total_expenses / context.transaction_count) if context.transaction_count > 0 else 0
+            'avg_transaction_amount': context.total_expenses / context.transaction_count if context.transaction_count > 0 else 0
         }
         
         return {
@@ -182,14 +206,15 @@ Answer in 2-4 sentences with specific data points:"""
         try:
             # Get financial context if requested
             if request.include_financial_context:
+                # Chat replies never use weekly trends, so skip computing them
                 context = await self.repository.get_financial_context(
-                    user_id, request.max_context_days
+                    user_id, request.max_context_days, include_trends=False
                 )
             else:
                 context = None
             
             # Generate response based on context and message
-            response = self._generate_chat_response(request.message, context)
+            response = await self._generate_chat_response(request.message, context)
             
             return ChatResponse(
                 message=response['message'],
@@ -202,10 +227,74 @@ Answer in 2-4 sentences with specific data points:"""
         except Exception as e:
             logger.error(f"Error in chat_with_ai: {e}")
             return ChatResponse(
-                message="I'm sorry, I'm having trouble processing your request right now. Please try again later.",
+                message=CHAT_ERROR_MESSAGE,
                 confidence_score=0.0
             )
     
+    async def stream_chat_with_ai(self, user_id: str, request: ChatRequest) -> AsyncIterator[Dict]:
+        """Stream a chat reply as the LLM generates it.
+        
+        Yields `{'delta': text}` events, then one final event with `done`
+        set and the same metadata a ChatResponse carries. If the LLM stream
+        breaks after some text was sent, the final event carries
+        `error: STREAM_INTERRUPTED_ERROR` and a zero confidence score, so
+        clients can tell a truncated reply from a complete one.
+        """
+        try:
+            if request.include_financial_context:
+                context = await self.repository.get_financial_context(
+                    user_id, request.max_context_days, include_trends=False
+                )
+            else:
+                context = None
+        except Exception as e:
+            logger.error(f"Error in stream_chat_with_ai: {e}")
+            yield {'delta': CHAT_ERROR_MESSAGE}
+            yield {'done': True, 'confidence_score': 0.0}
+            return
+        
+        streamed = False
+        interrupted = False
+        if self.llm_provider:
+            try:
+                chain = self._chat_prompt | self.llm_provider
+                async for chunk in chain.astream({
+                    "financial_context": self._format_financial_context(context),
+                    "question": request.message
+                }):
+                    # Chat models yield message chunks, completion models plain strings
+                    text = getattr(chunk, 'content', chunk)
+                    if text:
+                        streamed = True
+                        yield {'delta': text}
+            except Exception as e:
+                self.logger.warning(f"LLM chat stream failed: {e}")
+                interrupted = streamed
+        
+        if streamed:
+            response = {
+                'suggested_actions': self._extract_suggested_actions(context),
+                'financial_insights': self._extract_financial_insights(context),
+                # A reply cut off mid-stream is incomplete, so it claims no confidence
+                'confidence_score': 0.0 if interrupted else 0.95
+            }
+            if interrupted:
+                response['error'] = STREAM_INTERRUPTED_ERROR
+        else:
+            response = self._generate_fallback_chat_response(request.message, context)
+            yield {'delta': response['message']}
+        
+        done = {
+            'done': True,
+            'conversation_id': f"chat_{user_id}_{int(datetime.utcnow().timestamp()*1000)}",
+            'suggested_actions': response.get('suggested_actions', []),
+            'financial_insights': response.get('financial_insights', []),
+            'confidence_score': response.get('confidence_score', 0.8)
+        }
+        if 'error' in response:
+            done['error'] = response['error']
+        yield done
+    
     async def analyze_financial_data(
         self, 
         user_id: str, 
@@ -239,7 +328,7 @@ Answer in 2-4 sentences with specific data points:"""
                 generated_at=datetime.utcnow()
             )
     
-    def _generate_chat_response(self, message: str, context=None) -> Dict:
+    async def _generate_chat_response(self, message: str, context=None) -> Dict:
         """Generate a chat response using the LLM provider or fallback to basic responses."""
         # Try to use LLM provider first
         if self.llm_provider:
@@ -252,8 +341,8 @@ Answer in 2-4 sentences with specific data points:"""
                     # Add a unique timestamp to prevent caching
                     unique_question = f"{message} [timestamp: {datetime.utcnow().isoformat()}]"
                     
-                    # Generate response using LLM
-                    result = chat_chain.invoke({
+                    # Generate response using LLM without blocking other requests on the event loop
+                    result = await chat_chain.ainvoke({
                         "financial_context": financial_context,
                         "question": unique_question
                     })
@@ -349,27 +438,17 @@ Answer in 2-4 sentences with specific data points:"""
     def _extract_suggested_actions(self, context) -> List[str]:
         """Extract relevant suggested actions based on context."""
         if not context:
-            return ["Connect financial data", "Ask general financial advice"]
-        
-        actions = []
+            return list(NO_DATA_ACTIONS)
         
         # Add context-specific actions
         if hasattr(context, 'total_income') and hasattr(context, 'total_expenses'):
             net_amount = context.total_income - abs(context.total_expenses)
             savings_rate = (net_amount / context.total_income * 100) if context.total_income > 0 else 0
             
-            if savings_rate < 10:
-                actions.extend(["Review budget", "Find cost-cutting opportunities"])
-            elif savings_rate < 20:
-                actions.extend(["Optimize expenses", "Increase savings rate"])
-            else:
-                actions.extend(["Investment planning", "Long-term financial goals"])
+            return list(next(actions for bound, actions in SAVINGS_RATE_ACTIONS if savings_rate < bound))
         
         # Add general actions if none specific
-        if not actions:
-            actions = ["Track expenses", "Set financial goals", "Review spending patterns"]
-        
-        return actions[:4]  # Limit to 4 actions
+        return list(DEFAULT_ACTIONS)
     
     def _extract_financial_insights(self, context) -> List[str]:
         """Extract key financial insights from context."""
@@ -396,8 +475,6 @@ Answer in 2-4 sentences with specific data points:"""
     
     def _generate_fallback_chat_response(self, message: str, context=None) -> Dict:
         """Generate basic chat response when LLM is unavailable."""
-        message_lower = message.lower()
-        
         response = {
             'message': "",
             'suggested_actions': [],
@@ -413,24 +490,27 @@ Answer in 2-4 sentences with specific data points:"""
         
         if context and hasattr(context, 'total_income'):
             # Handle spending questions
-            if any(word in message_lower for word in ['spend', 'spending', 'expense', 'cost', 'category']):
-                base_message = f"Your total expenses are ${abs(context.total_expenses):.2f}. "
-                if hasattr(context, 'top_categories') and context.top_categories:
-                    top_cat = context.top_categories[0]
-                    base_message += f"Your biggest expense category is **{top_cat['category']}** at ${abs(top_cat['total_amount']):.2f}."
+            if SPENDING_KEYWORDS_RE.search(message):
+                total_expenses = abs(context.total_expenses)
+                top_cat = context.top_categories[0] if getattr(context, 'top_categories', None) else None
+                if top_cat:
+                    base_message = (f"Your total expenses are ${total_expenses:.2f}. "
+                                    f"Your biggest expense category is **{top_cat['category']}** at ${abs(top_cat['total_amount']):.2f}.")
+                else:
+                    base_message = f"Your total expenses are ${total_expenses:.2f}. "
                 response['message'] = add_date_context(base_message)
-                response['suggested_actions'] = ["Review top categories", "Find cost-cutting opportunities", "Set category budgets"]
+                response['suggested_actions'] = list(SPENDING_ACTIONS)
                 response['financial_insights'] = [
-                    f"Total expenses: ${abs(context.total_expenses):.2f}",
-                    f"Top category: {context.top_categories[0]['category'] if context.top_categories else 'N/A'}"
+                    f"Total expenses: ${total_expenses:.2f}",
+                    f"Top category: {top_cat['category'] if top_cat else 'N/A'}"
                 ]
             else:
-                response['message'] = "I can help you analyze your spending patterns and financial health. What would you like to know?"
+                response['message'] = GENERAL_CHAT_MESSAGE
                 response['suggested_actions'] = self._extract_suggested_actions(context)
                 response['financial_insights'] = self._extract_financial_insights(context)
         else:
-            response['message'] = "I'd love to help with your financial questions! Connect your financial data so I can provide personalized insights about your spending and savings."
-            response['suggested_actions'] = ["Connect financial data", "Ask general financial advice"]
+            response['message'] = NO_DATA_CHAT_MESSAGE
+            response['suggested_actions'] = list(NO_DATA_ACTIONS)
         
         return response
     
@@ -441,12 +521,12 @@ Answer in 2-4 sentences with specific data points:"""
         if analysis_type == 'spending_patterns':
             return {
                 'results': {
-                    'total_spending': float(context.total_expenses),
-                    'avg_daily_spending': float(context.total_expenses) / 30,
+                    'total_spending': context.total_expenses,
+                    'avg_daily_spending': context.total_expenses / 30,
                     'category_count': len(context.top_categories)
                 },
                 'insights': [
-                    f"Your average daily spending is ${float(context.total_expenses) / 30:.2f}",
+                    f"Your average daily spending is ${context.total_expenses / 30:.2f}",
                     f"You have transactions across {len(context.top_categories)} categories"
                 ],
                 'confidence_score': 0.9
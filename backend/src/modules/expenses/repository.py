@@ -1,5 +1,6 @@
 """Expense repository for data access operations."""
 
+import heapq
 import logging
 from datetime import date, datetime
 from decimal import Decimal
@@ -184,15 +185,13 @@ class ExpenseRepository:
                 category_stats[category]['total_amount'] += amount
                 category_stats[category]['transaction_count'] += 1
             
-            # Sort by total amount and return top categories
-            sorted_categories = sorted(
+            # Select top categories by total amount without sorting them all
+            return heapq.nlargest(
+                limit,
                 category_stats.values(),
-                key=lambda x: x['total_amount'],
-                reverse=True
+                key=lambda x: x['total_amount']
             )
             
-            return sorted_categories[:limit]
-            
         except Exception as e:
             logger.error(f"Error getting top categories: {e}")
             raise
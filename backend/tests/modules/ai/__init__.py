@@ -0,0 +1 @@
+"""AI module test package initialization."""
@@ -0,0 +1,136 @@
+"""Tests for AIRepository.get_financial_context."""
+
+from unittest.mock import Mock
+
+import pytest
+from postgrest.exceptions import APIError
+
+from services.cache_service import clear_all_caches
+from src.modules.ai import repository as ai_repository
+from src.modules.ai.repository import AIRepository
+
+
+ROWS = [
+    {"amount": 3000.0, "category": "salary", "type": "income", "date": "2024-01-31"},
+    {"amount": -50.0, "category": "food", "type": "expense", "date": "2024-01-30"},
+    {"amount": -120.0, "category": "rent", "type": "expense", "date": "2024-01-24"},
+    {"amount": -30.0, "category": "food", "type": "expense", "date": "2024-01-23"},
+]
+
+# What ai_financial_context returns for ROWS with days_back=30
+SUMMARY = {
+    "start_date": "2024-01-01",
+    "end_date": "2024-01-31",
+    "total_income": 3000.0,
+    "total_expenses": 200.0,
+    "transaction_count": 4,
+    "top_categories": [
+        {"category": "rent", "total_amount": 120.0, "transaction_count": 1},
+        {"category": "food", "total_amount": 80.0, "transaction_count": 2},
+    ],
+    "weekly_totals": [
+        {"week_start": "2024-01-22", "total_amount": -150.0},
+        {"week_start": "2024-01-29", "total_amount": -50.0},
+    ],
+}
+
+MISSING_FUNCTION = {"code": "PGRST202", "message": "Could not find the function public.ai_financial_context"}
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST table query over ROWS."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        if self.columns == "date":
+            return Mock(data=[{"date": ROWS[0]["date"]}])
+        return Mock(data=ROWS)
+
+
+class FakeClient:
+    """Supabase client whose RPC returns SUMMARY or raises the given APIError payload."""
+
+    def __init__(self, rpc_error=None):
+        self.rpc_error = rpc_error
+        self.rpc_calls = 0
+
+    def rpc(self, name, params):
+        self.rpc_calls += 1
+        call = Mock()
+        if self.rpc_error:
+            call.execute.side_effect = APIError(self.rpc_error)
+        else:
+            call.execute.return_value = Mock(data=SUMMARY)
+        return call
+
+    def table(self, name):
+        return Mock(select=FakeQuery)
+
+
+def _repository(rpc_error=None) -> AIRepository:
+    return AIRepository(Mock(client=FakeClient(rpc_error)))
+
+
+@pytest.mark.asyncio
+class TestGetFinancialContext:
+    """Test suite for the RPC path and Python fallback of get_financial_context."""
+
+    @pytest.fixture(autouse=True)
+    def reset_caches(self):
+        """Start each test with empty caches."""
+        clear_all_caches()
+        yield
+        clear_all_caches()
+
+    async def test_uses_rpc_summary(self):
+        """Test the context is built from ai_financial_context when it exists."""
+        repository = _repository()
+
+        context = await repository.get_financial_context("user_1")
+
+        assert repository.supabase.client.rpc_calls == 1
+        assert context.total_income == 3000.0
+        assert context.total_expenses == 200.0
+        assert [c["category"] for c in context.top_categories] == ["rent", "food"]
+        assert context.top_categories[1]["avg_amount"] == 40.0
+
+    async def test_missing_function_falls_back_with_cooldown(self, monkeypatch):
+        """Test PGRST202 falls back to Python and skips the RPC until the cooldown passes."""
+        now = 1000.0
+        monkeypatch.setattr(ai_repository.time, "monotonic", lambda: now)
+        repository = _repository(MISSING_FUNCTION)
+
+        context = await repository.get_financial_context("user_1")
+        assert context.transaction_count == len(ROWS)
+        assert repository.supabase.client.rpc_calls == 1
+
+        clear_all_caches()
+        now += ai_repository.CONTEXT_RPC_RETRY_SECONDS - 1
+        await repository.get_financial_context("user_1")
+        assert repository.supabase.client.rpc_calls == 1
+
+        clear_all_caches()
+        now += 1
+        await repository.get_financial_context("user_1")
+        assert repository.supabase.client.rpc_calls == 2
+
+    async def test_other_rpc_errors_are_raised(self):
+        """Test errors other than a missing function are not masked by the fallback."""
+        repository = _repository({"code": "57014", "message": "canceling statement due to statement timeout"})
+
+        with pytest.raises(APIError):
+            await repository.get_financial_context("user_1")
+
+    async def test_summary_and_aggregation_agree(self):
+        """Test the RPC summary and the Python aggregation build the same context."""
+        repository = _repository()
+
+        from_summary = repository._context_from_summary(SUMMARY, include_trends=True)
+        aggregated = await repository._aggregate_financial_context("user_1", 30, include_trends=True)
+
+        assert from_summary == aggregated
@@ -0,0 +1,107 @@
+"""Tests for streaming AI chat replies over /ai/chat/stream."""
+
+import orjson
+import pytest
+from unittest.mock import AsyncMock, Mock
+from langchain_core.runnables import RunnableGenerator
+
+pytest.importorskip("langchain.chains")
+
+from src.modules.ai import controller
+from src.modules.ai.schemas import ChatRequest, FinancialContext
+from src.modules.ai.service import AIService, STREAM_INTERRUPTED_ERROR
+
+
+CONTEXT = FinancialContext(
+    total_income=3000.0,
+    total_expenses=1200.0,
+    net_amount=1800.0,
+    top_categories=[{"category": "food", "total_amount": 400.0, "transaction_count": 4, "avg_amount": 100.0}],
+    recent_trends=[],
+    transaction_count=12,
+    date_range={"start": "2024-01-01", "end": "2024-01-31"}
+)
+
+
+def _llm(*tokens, fail_after=False):
+    """Build a runnable LLM stand-in that streams tokens, optionally breaking after them."""
+    async def generate(inputs):
+        async for _ in inputs:
+            pass
+        for token in tokens:
+            yield token
+        if fail_after:
+            raise RuntimeError("connection reset")
+
+    return RunnableGenerator(generate)
+
+
+def _service(llm=None) -> AIService:
+    repository = Mock()
+    repository.get_financial_context = AsyncMock(return_value=CONTEXT)
+    return AIService(repository, llm_provider=llm)
+
+
+async def _collect(service: AIService, message: str = "How much did I spend on food?"):
+    return [event async for event in service.stream_chat_with_ai("user_1", ChatRequest(message=message))]
+
+
+@pytest.mark.asyncio
+class TestStreamChatWithAI:
+    """Test suite for AIService.stream_chat_with_ai."""
+
+    async def test_streams_deltas_then_done(self):
+        """Test LLM tokens become delta events followed by one done event."""
+        events = await _collect(_service(_llm("You spent ", "$400 on food.")))
+
+        assert [e["delta"] for e in events[:-1]] == ["You spent ", "$400 on food."]
+        done = events[-1]
+        assert done["done"] is True
+        assert done["confidence_score"] == 0.95
+        assert "error" not in done
+
+    async def test_fallback_without_llm(self):
+        """Test a missing LLM sends the rule-based reply as a single delta."""
+        events = await _collect(_service())
+
+        assert len(events) == 2
+        assert events[0]["delta"]
+        assert events[1]["done"] is True
+        assert "error" not in events[1]
+
+    async def test_fallback_when_llm_fails_before_any_text(self):
+        """Test an LLM failing before its first token falls back to the rule-based reply."""
+        events = await _collect(_service(_llm(fail_after=True)))
+
+        assert len(events) == 2
+        assert events[0]["delta"]
+        assert "error" not in events[1]
+
+    async def test_mid_stream_failure_is_flagged(self):
+        """Test a stream broken after some text ends with an error and no confidence."""
+        events = await _collect(_service(_llm("You spent ", fail_after=True)))
+
+        assert [e["delta"] for e in events[:-1]] == ["You spent "]
+        done = events[-1]
+        assert done["done"] is True
+        assert done["error"] == STREAM_INTERRUPTED_ERROR
+        assert done["confidence_score"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_route_frames_events_as_sse():
+    """Test the route sends each event as one `data:` line followed by a blank line."""
+    response = await controller.stream_chat_with_ai(
+        ChatRequest(message="How much did I spend on food?"),
+        current_user={"user_id": "user_1"},
+        service=_service(_llm("You spent ", "$400."))
+    )
+
+    assert response.media_type == "text/event-stream"
+    chunks = [chunk async for chunk in response.body_iterator]
+    for chunk in chunks:
+        assert chunk.startswith(b"data: ") and chunk.endswith(b"\n\n")
+        assert b"\n" not in chunk[:-2]
+    events = [orjson.loads(chunk[len(b"data: "):-2]) for chunk in chunks]
+    assert [e.get("delta") for e in events[:-1]] == ["You spent ", "$400."]
+    assert events[-1]["done"] is True
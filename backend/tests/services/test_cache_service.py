@@ -0,0 +1,130 @@
+"""Tests for the async TTL cache used by analytics services."""
+
+import asyncio
+
+import pytest
+
+from services.cache_service import async_ttl_cache, clear_all_caches, invalidate_user_cache
+
+
+class CountingService:
+    """Minimal service whose calls are counted to observe cache hits."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    @async_ttl_cache(ttl=60)
+    async def get_summary(self, user_id: str, days: int = 30) -> dict:
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        return {"user_id": user_id, "days": days, "call": self.calls}
+
+    @async_ttl_cache(ttl=60, per_user=False)
+    async def get_users(self, days: int = 30) -> dict:
+        self.calls += 1
+        return {"days": days, "call": self.calls}
+
+
+@pytest.mark.asyncio
+class TestAsyncTTLCache:
+    """Test suite for async_ttl_cache."""
+
+    @pytest.fixture(autouse=True)
+    def reset_caches(self):
+        """Start each test with empty caches."""
+        clear_all_caches()
+        yield
+        clear_all_caches()
+
+    async def test_repeated_calls_hit_cache(self):
+        """Test repeated calls with the same arguments are computed once."""
+        service = CountingService()
+
+        first = await service.get_summary("user123", 30)
+        second = await service.get_summary("user123", days=30)
+        third = await service.get_summary("user123")
+
+        assert first == second == third
+        assert service.calls == 1
+
+    async def test_different_arguments_are_cached_separately(self):
+        """Test the cache key includes every argument."""
+        service = CountingService()
+
+        await service.get_summary("user123", 30)
+        await service.get_summary("user123", 90)
+        await service.get_summary("user456", 30)
+
+        assert service.calls == 3
+
+    async def test_concurrent_calls_share_one_computation(self):
+        """Test concurrent callers for the same key are deduplicated."""
+        service = CountingService()
+
+        results = await asyncio.gather(*(service.get_summary("user123") for _ in range(5)))
+
+        assert service.calls == 1
+        assert all(result == results[0] for result in results)
+
+    async def test_invalidate_user_cache(self):
+        """Test invalidation only drops the affected user's entries."""
+        service = CountingService()
+
+        await service.get_summary("user123")
+        await service.get_summary("user456")
+        invalidate_user_cache("user123")
+        refreshed = await service.get_summary("user123")
+        await service.get_summary("user456")
+
+        assert refreshed["call"] == 3
+        assert service.calls == 3
+
+    async def test_cross_user_cache_invalidated_by_any_write(self):
+        """Test per_user=False entries are dropped when any user's data changes."""
+        service = CountingService()
+
+        await service.get_users(30)
+        await service.get_users(days=30)
+        invalidate_user_cache("user456")
+        refreshed = await service.get_users(30)
+
+        assert refreshed["call"] == 2
+        assert service.calls == 2
+
+    async def test_errors_are_not_cached(self):
+        """Test a call that raises is recomputed on the next call."""
+        service = CountingService()
+        service.fail = True
+
+        with pytest.raises(RuntimeError):
+            await service.get_summary("user123")
+        service.fail = False
+        result = await service.get_summary("user123")
+
+        assert result["call"] == 2
+        assert service.calls == 2
+
+    async def test_instances_do_not_share_entries(self):
+        """Test the cache key includes the instance."""
+        first_service = CountingService()
+        second_service = CountingService()
+
+        await first_service.get_summary("user123")
+        await second_service.get_summary("user123")
+
+        assert first_service.calls == 1
+        assert second_service.calls == 1
+
+    async def test_callers_get_independent_copies(self):
+        """Test changing the top level of a returned value doesn't change the cached entry."""
+        service = CountingService()
+
+        first = await service.get_summary("user123")
+        first["days"] = 0
+        second = await service.get_summary("user123")
+
+        assert second["days"] == 30
+        assert service.calls == 1
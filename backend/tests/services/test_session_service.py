@@ -0,0 +1,47 @@
+"""Tests for SessionService chat history management."""
+
+import time
+
+from services.session_service import SessionService
+
+
+class TestSessionService:
+    """Test suite for SessionService."""
+
+    def test_history_is_bounded(self):
+        """Test only the most recent turns are kept."""
+        service = SessionService(max_history_length=3)
+
+        for i in range(5):
+            service.add_to_history("session1", f"q{i}", f"a{i}")
+
+        assert service.get_chat_history("session1") == [("q2", "a2"), ("q3", "a3"), ("q4", "a4")]
+
+    def test_unknown_session_has_empty_history(self):
+        """Test an unknown session returns an empty list."""
+        service = SessionService()
+
+        assert service.get_chat_history("missing") == []
+
+    def test_clear_session(self):
+        """Test clearing removes the session and reports whether it existed."""
+        service = SessionService()
+        service.add_to_history("session1", "q", "a")
+
+        assert service.clear_session("session1") is True
+        assert service.clear_session("session1") is False
+        assert service.get_active_sessions() == []
+
+    def test_expired_sessions_are_cleaned_up(self):
+        """Test sessions past the timeout are dropped on the next access."""
+        service = SessionService(session_timeout_hours=0)
+        service.add_to_history("session1", "q", "a")
+        time.sleep(0.01)
+
+        assert service.get_chat_history("session1") == []
+        assert service.get_active_sessions() == []
+
+        # A recreated session is scheduled for expiry again
+        service.session_timeout_seconds = 3600.0
+        service.add_to_history("session1", "q2", "a2")
+        assert service.get_chat_history("session1") == [("q2", "a2")]
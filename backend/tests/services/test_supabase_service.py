@@ -0,0 +1,62 @@
+"""Tests for the Supabase client wrapper."""
+
+import httpx
+import pytest
+
+from services.supabase_service import SupabaseClient
+
+
+def _client_with_transport(handler) -> SupabaseClient:
+    """Build a SupabaseClient whose pooled HTTP client answers through `handler`."""
+    client = SupabaseClient()
+    client._http_client = httpx.Client(transport=httpx.MockTransport(handler))
+    return client
+
+
+class TestHealthCheck:
+    """Test suite for SupabaseClient.health_check."""
+
+    @pytest.fixture
+    def head_calls(self):
+        """Record HEAD requests instead of sending them."""
+        return []
+
+    @pytest.fixture
+    def client(self, head_calls):
+        """SupabaseClient answering every request with 200."""
+        def handler(request):
+            head_calls.append(request)
+            return httpx.Response(200)
+
+        return _client_with_transport(handler)
+
+    def test_health_check_probes_rest_root(self, client, head_calls):
+        """Test health check issues a HEAD request against the REST root."""
+        result = client.health_check()
+
+        assert result["status"] == "healthy"
+        assert len(head_calls) == 1
+        assert head_calls[0].method == "HEAD"
+        assert str(head_calls[0].url).endswith("/rest/v1/")
+
+    def test_health_check_result_is_cached(self, client, head_calls):
+        """Test repeated probes reuse the cached result."""
+        client.health_check()
+        client.health_check()
+
+        assert len(head_calls) == 1
+
+    def test_health_check_reports_failure(self):
+        """Test health check reports unhealthy on HTTP errors."""
+        client = _client_with_transport(lambda request: httpx.Response(503))
+
+        result = client.health_check()
+
+        assert result["status"] == "unhealthy"
+        assert "503" in result["error"]
+
+    def test_http_client_is_reused(self):
+        """Test the pooled HTTP client is created once per SupabaseClient."""
+        client = SupabaseClient()
+
+        assert client.http_client is client.http_client
@@ -0,0 +1,116 @@
+"""Tests for the bulk seeding path of setup_database."""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+import pytest
+
+import setup_database
+from setup_database import DatabaseSetup, TransactionRow
+
+
+class RecordingConnection:
+    """Stand-in for an asyncpg connection that records executed SQL."""
+
+    def __init__(self):
+        self.statements = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, sql, *args):
+        self.statements.append((sql, args))
+        return "INSERT 0 2"
+
+
+def _make_setup(num_shards: int = 1) -> DatabaseSetup:
+    """Build a DatabaseSetup with a recording connection and stubbed loaders."""
+    setup = DatabaseSetup.__new__(DatabaseSetup)
+    setup.db_conn = RecordingConnection()
+    setup.num_shards = num_shards
+
+    async def populate(prepared):
+        setup.db_conn.statements.append(("populate", ()))
+        return True
+
+    async def drop_indexes(table_name):
+        return []
+
+    setup.populate_users = populate
+    setup.populate_transactions = populate
+    setup._drop_secondary_indexes = drop_indexes
+    return setup
+
+
+USERS = ([{"id": "user_1"}, {"id": "user_2"}], 0)
+TRANSACTIONS = ([
+    TransactionRow("tx_1", "user_1", -10, "Lunch", "food", "expense", "2024-01-01", "2024-01-01T00:00:00"),
+    TransactionRow("tx_2", "user_3", 50, "Pay", "salary", "income", "2024-01-01", "2024-01-01T00:00:00"),
+], 0)
+
+
+@pytest.mark.asyncio
+class TestBulkLoadDailySummary:
+    """Test suite for keeping user_daily_summary in step during bulk loads."""
+
+    async def test_trigger_disabled_during_copy_and_summary_rebuilt(self):
+        """Test the per-row trigger is off for the COPY and the summary is rebuilt once after it."""
+        setup = _make_setup()
+
+        assert await setup._bulk_load_in_transaction(USERS, TRANSACTIONS)
+
+        statements = [sql for sql, _ in setup.db_conn.statements]
+        disable = statements.index(
+            f"ALTER TABLE public.transactions DISABLE TRIGGER {setup_database.SUMMARY_TRIGGER}"
+        )
+        enable = statements.index(
+            f"ALTER TABLE public.transactions ENABLE TRIGGER {setup_database.SUMMARY_TRIGGER}"
+        )
+        populates = [i for i, sql in enumerate(statements) if sql == "populate"]
+        rebuilds = [i for i, sql in enumerate(statements) if "public.user_daily_summary" in sql]
+
+        assert disable < populates[0] and populates[-1] < rebuilds[0]
+        assert rebuilds[-1] < enable == len(statements) - 1
+        assert "GROUP BY user_id, date, category, type" in statements[rebuilds[-1]]
+
+    async def test_summary_rebuild_covers_loaded_users(self):
+        """Test the rebuild is scoped to every user the load touched."""
+        setup = _make_setup()
+
+        await setup._bulk_load_in_transaction(USERS, TRANSACTIONS)
+
+        rebuild_args = [args for sql, args in setup.db_conn.statements if "public.user_daily_summary" in sql]
+        assert rebuild_args
+        assert all(args == (["user_1", "user_2", "user_3"],) for args in rebuild_args)
+
+    async def test_sharded_load_keeps_trigger(self):
+        """Test parallel shard runs leave the trigger on instead of locking the table."""
+        setup = _make_setup(num_shards=4)
+
+        assert await setup._bulk_load_in_transaction(USERS, TRANSACTIONS)
+
+        statements = [sql for sql, _ in setup.db_conn.statements]
+        assert not any("TRIGGER" in sql or "public.user_daily_summary" in sql for sql in statements)
+
+
+@pytest.mark.asyncio
+async def test_early_exit_cancels_row_preparation():
+    """Test a setup that stops before loading doesn't leave row preparation running."""
+    setup = DatabaseSetup.__new__(DatabaseSetup)
+    setup._users = [{"id": "user_1"}]
+    setup.db_conn = None
+    released = threading.Event()
+    setup.prepare_rows = lambda: released.wait(5)
+
+    async def connect_db(direct):
+        return None
+
+    setup._connect_db = connect_db
+
+    try:
+        assert await setup.setup_complete_database(apply_schema=True) is False
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+    finally:
+        released.set()